@@ -6,48 +6,136 @@ SQL injection and unauthorized access.
 """
 
 import re
-from typing import Any, Dict, Optional
-from pydantic import BaseModel, Field, field_validator
-from supabase import create_client, Client
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Dict, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 import logging
-import sys
+import threading
+from urllib.parse import urlsplit
 
-# Configure logging to stderr only (never stdout - corrupts MCP JSON-RPC)
-logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Logging is configured (stderr only) by the server entry point; importing
+# this module must not touch the root logger.
 logger = logging.getLogger("supabase-mcp.database")
 
+# System tables and schemas that must never be accessed (lowercase)
+_SYSTEM_PREFIXES = (
+    "pg_", "information_schema", "auth.", "storage.",
+    "realtime.", "extensions.", "vault.", "supabase_"
+)
+
+# Dangerous SQL injection patterns checked against filter values
+_DANGEROUS_PATTERNS = (
+    r';\s*drop\s+',      # DROP statements
+    r';\s*delete\s+',    # DELETE statements
+    r';\s*update\s+',    # UPDATE statements
+    r';\s*insert\s+',    # INSERT statements
+    r'--.*',             # SQL comments
+    r'/\*.*\*/',         # Multi-line comments
+    r'\bor\b.*\b1\s*=\s*1\b',  # Classic injection
+    r'\bunion\b.*\bselect\b',   # UNION SELECT
+    r'\bexec\b',         # EXEC statements
+    r'\bsp_\w+',         # Stored procedures
+    r'\bxp_\w+',         # Extended procedures
+)
+
+# Single alternation so each value is scanned once instead of once per pattern
+_SQLI_RE = re.compile("|".join(f"(?:{p})" for p in _DANGEROUS_PATTERNS), re.IGNORECASE)
+
+
+def _is_sql_identifier(name: str) -> bool:
+    """Check a table/column name matches ``[A-Za-z_][A-Za-z0-9_]*``.
+    
+    For ASCII strings ``str.isidentifier`` implements exactly this rule, and
+    both checks run in C without entering the regex engine.
+    """
+    return isinstance(name, str) and name.isascii() and name.isidentifier()
+
+
+def _validate_table_name_field(cls, v: str) -> str:
+    """Validate table name format for security (shared by all request models)."""
+    if not _is_sql_identifier(v):
+        raise ValueError("Invalid table name format - only alphanumeric and underscores allowed")
+    # A valid identifier contains no whitespace, so the value is returned as-is
+    return v
+
+
+# Request models are validated once and never modified afterwards; frozen
+# instances can be shared safely (see TableQueryRequest.cached)
+_REQUEST_MODEL_CONFIG = ConfigDict(extra="forbid", frozen=True)
+
 
 class TableQueryRequest(BaseModel):
     """Request model for table query operations."""
     
+    model_config = _REQUEST_MODEL_CONFIG
+    
     table_name: str = Field(..., min_length=1, description="Table name to query")
     limit: Optional[int] = Field(None, ge=1, le=1000, description="Maximum results (default: 100)")
     filters: Optional[Dict[str, Any]] = Field(None, description="Filters as key-value pairs")
     
-    @field_validator('table_name')
+    validate_table_name = field_validator('table_name', mode='after')(classmethod(_validate_table_name_field))
+    
+    @classmethod
+    def cached(
+        cls,
+        table_name: str,
+        limit: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> "TableQueryRequest":
+        """Build a request, reusing the validated instance for repeated inputs.
+        
+        The returned instance may be shared between callers and must not be
+        mutated. Inputs that are not hashable, and filter maps too large to
+        be worth caching, skip the cache.
+        
+        Raises:
+            ValidationError: If the inputs fail model validation
+        """
+        if filters is not None and not _is_small_filter_map(filters):
+            # Large filter maps would stay pinned in the cache
+            return cls(table_name=table_name, limit=limit, filters=filters)
+        
+        try:
+            # Types are part of the key so that e.g. 1 and True stay distinct
+            filters_key = (
+                tuple((key, type(value), value) for key, value in filters.items())
+                if filters is not None else None
+            )
+            return cls._cached_instance(table_name, type(limit), limit, filters_key)
+        except TypeError:
+            return cls(table_name=table_name, limit=limit, filters=filters)
+    
     @classmethod
-    def validate_table_name(cls, v: str) -> str:
-        """Validate table name format for security."""
-        if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', v):
-            raise ValueError("Invalid table name format - only alphanumeric and underscores allowed")
-        return v.strip()
+    @lru_cache(maxsize=512)
+    def _cached_instance(
+        cls,
+        table_name: str,
+        limit_type: type,
+        limit: Optional[int],
+        filters_key: Optional[Tuple[Tuple[str, type, Any], ...]]
+    ) -> "TableQueryRequest":
+        """Construct and memoize a request from its hashable cache key."""
+        filters = (
+            {key: value for key, _, value in filters_key}
+            if filters_key is not None else None
+        )
+        return cls(table_name=table_name, limit=limit, filters=filters)
 
 
 class RecordInsertRequest(BaseModel):
     """Request model for record insertion operations."""
     
+    model_config = _REQUEST_MODEL_CONFIG
+    
     table_name: str = Field(..., min_length=1, description="Table name for insertion")
     data: Dict[str, Any] = Field(..., description="Record data to insert")
     
-    @field_validator('table_name')
-    @classmethod
-    def validate_table_name(cls, v: str) -> str:
-        """Validate table name format for security."""
-        if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', v):
-            raise ValueError("Invalid table name format - only alphanumeric and underscores allowed")
-        return v.strip()
+    validate_table_name = field_validator('table_name', mode='after')(classmethod(_validate_table_name_field))
     
-    @field_validator('data')
+    @field_validator('data', mode='after')
     @classmethod
     def validate_data_not_empty(cls, v: Dict[str, Any]) -> Dict[str, Any]:
         """Validate that data is not empty."""
@@ -59,107 +147,229 @@ class RecordInsertRequest(BaseModel):
 class RecordUpdateRequest(BaseModel):
     """Request model for record update operations."""
     
+    model_config = _REQUEST_MODEL_CONFIG
+    
     table_name: str = Field(..., min_length=1, description="Table name to update")
     filters: Dict[str, Any] = Field(..., description="Conditions to identify records")
     updates: Dict[str, Any] = Field(..., description="New values to set")
     
-    @field_validator('table_name')
-    @classmethod
-    def validate_table_name(cls, v: str) -> str:
-        """Validate table name format for security."""
-        if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', v):
-            raise ValueError("Invalid table name format - only alphanumeric and underscores allowed")
-        return v.strip()
+    validate_table_name = field_validator('table_name', mode='after')(classmethod(_validate_table_name_field))
 
 
-def validate_table_name(table_name: str) -> Dict[str, Any]:
-    """Validate table name for security and format compliance.
+# Result of a cached check: (is_valid, constant error message, offending field)
+_CheckResult = Tuple[bool, Optional[str], Optional[str]]
+
+_VALID: _CheckResult = (True, None, None)
+
+
+def _validation_result(is_valid: bool, error: Optional[str], field: Optional[str]) -> Dict[str, Any]:
+    """Build the public validation result dict from a cached check.
     
-    Args:
-        table_name: The table name to validate
-        
-    Returns:
-        Dict with 'is_valid' boolean and optional 'error' message
+    Error messages are constants; the offending field is only formatted
+    into the message here, on the failure path.
     """
+    if is_valid:
+        return {"is_valid": True}
+    if field is None:
+        return {"is_valid": False, "error": error}
+    return {"is_valid": False, "error": f"{error}: {field}", "field": field}
+
+
+# Postgres truncates identifiers beyond NAMEDATALEN - 1 bytes; longer names
+# are still checked, just not cached
+_MAX_CACHED_IDENTIFIER_LENGTH = 63
+
+
+def _check_table_name(table_name: str) -> _CheckResult:
+    """Check table name format and access rules (pure)."""
     if not table_name or not table_name.strip():
-        return {"is_valid": False, "error": "Table name cannot be empty"}
+        return False, "Table name cannot be empty", None
     
     # Only allow alphanumeric characters and underscores
-    if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', table_name):
-        return {
-            "is_valid": False, 
-            "error": "Invalid table name format - only alphanumeric characters and underscores allowed"
-        }
+    if not _is_sql_identifier(table_name):
+        return False, "Invalid table name format - only alphanumeric characters and underscores allowed", None
     
     # Prevent access to system tables and schemas
-    system_prefixes = [
-        "pg_", "information_schema", "auth.", "storage.", 
-        "realtime.", "extensions.", "vault.", "supabase_"
-    ]
-    
     table_lower = table_name.lower()
-    for prefix in system_prefixes:
-        if table_lower.startswith(prefix.lower()):
-            return {
-                "is_valid": False, 
-                "error": f"Access to system tables/schemas not allowed: {prefix}"
-            }
+    if table_lower.startswith(_SYSTEM_PREFIXES):
+        prefix = next(p for p in _SYSTEM_PREFIXES if table_lower.startswith(p))
+        return False, "Access to system tables/schemas not allowed", prefix
+    
+    return _VALID
+
+
+_check_table_name_cached = lru_cache(maxsize=1024)(_check_table_name)
+
+
+def validate_table_name(table_name: str) -> Dict[str, Any]:
+    """Validate table name for security and format compliance.
     
-    return {"is_valid": True}
+    Args:
+        table_name: The table name to validate
+        
+    Returns:
+        Dict with 'is_valid' boolean, optional 'error' message and
+        optional offending 'field'
+    """
+    if table_name and len(table_name) > _MAX_CACHED_IDENTIFIER_LENGTH:
+        return _validation_result(*_check_table_name(table_name))
+    return _validation_result(*_check_table_name_cached(table_name))
+
+
+# Longest string accepted as a filter or column value
+_MAX_COLUMN_VALUE_LENGTH = 1000
+
+# Largest filter map whose validation result is cached; bigger maps are rare
+# repeats and would pin their values in the cache
+_MAX_CACHED_ITEMS = 8
+
+
+def _is_small_filter_map(filters: Dict[str, Any]) -> bool:
+    """Return whether a filter map is small enough to be cached."""
+    return len(filters) <= _MAX_CACHED_ITEMS and not any(
+        isinstance(value, str) and len(value) > _MAX_COLUMN_VALUE_LENGTH
+        for value in filters.values()
+    )
+
+
+def _check_column_items(items: Tuple[Tuple[str, Any], ...]) -> _CheckResult:
+    """Check column names and filter values for injection patterns (pure)."""
+    for key, value in items:
+        # Validate column names
+        if not _is_sql_identifier(key):
+            return False, "Invalid column name format", key
+        
+        # Only string values can carry injection payloads
+        if isinstance(value, str):
+            # Check for excessively long values first - cheaper than a regex scan
+            if len(value) > _MAX_COLUMN_VALUE_LENGTH:
+                return False, "Filter value too long for column", key
+            
+            # Check filter values for dangerous patterns
+            if _SQLI_RE.search(value):
+                return False, "Potentially dangerous pattern detected in filter", key
+    
+    return _VALID
+
+
+_check_column_items_cached = lru_cache(maxsize=1024)(_check_column_items)
 
 
 def validate_column_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
     """Validate filter parameters for SQL injection protection.
     
+    Results for small filter maps with short, hashable values are cached,
+    since the same filters tend to be validated repeatedly within a session.
+    
     Args:
         filters: Dictionary of column filters
         
     Returns:
-        Dict with 'is_valid' boolean and optional 'error' message
+        Dict with 'is_valid' boolean, optional 'error' message and
+        optional offending 'field' (column name)
     """
     if not filters:
         return {"is_valid": True}
     
-    # Check for dangerous SQL injection patterns
-    dangerous_patterns = [
-        r';\s*drop\s+',      # DROP statements
-        r';\s*delete\s+',    # DELETE statements  
-        r';\s*update\s+',    # UPDATE statements
-        r';\s*insert\s+',    # INSERT statements
-        r'--.*',             # SQL comments
-        r'/\*.*\*/',         # Multi-line comments
-        r'\bor\b.*\b1\s*=\s*1\b',  # Classic injection
-        r'\bunion\b.*\bselect\b',   # UNION SELECT
-        r'\bexec\b',         # EXEC statements
-        r'\bsp_\w+',         # Stored procedures
-        r'\bxp_\w+',         # Extended procedures
-    ]
-    
-    for key, value in filters.items():
-        # Validate column names
-        if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', key):
-            return {
-                "is_valid": False, 
-                "error": f"Invalid column name format: {key}"
-            }
+    items = tuple(filters.items())
+    if not _is_small_filter_map(filters):
+        return _validation_result(*_check_column_items(items))
+    
+    try:
+        result = _check_column_items_cached(items)
+    except TypeError:
+        # Unhashable values (lists, nested dicts) bypass the cache
+        result = _check_column_items(items)
+    
+    return _validation_result(*result)
+
+
+def validate_column_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate column names and values of an insert or update payload.
+    
+    Unlike filters, row data is rarely validated twice and may be large, so
+    it is never cached.
+    
+    Args:
+        data: Dictionary of column values
         
-        # Check filter values for dangerous patterns
-        if isinstance(value, str):
-            for pattern in dangerous_patterns:
-                if re.search(pattern, value, re.IGNORECASE):
-                    return {
-                        "is_valid": False, 
-                        "error": f"Potentially dangerous pattern detected in filter: {key}"
-                    }
-        
-        # Check for excessively long values that might indicate an attack
-        if isinstance(value, str) and len(value) > 1000:
-            return {
-                "is_valid": False,
-                "error": f"Filter value too long for column: {key}"
-            }
+    Returns:
+        Same result format as validate_column_filters
+    """
+    if not data:
+        return {"is_valid": True}
+    return _validation_result(*_check_column_items(tuple(data.items())))
+
+
+# Connection pool for the PostgREST HTTP client: sized above the tool worker
+# pool, and idle keep-alive connections are held long enough that bursts of
+# tool calls reuse them instead of paying a new TCP+TLS handshake each time
+_HTTP_MAX_CONNECTIONS = 50
+_HTTP_MAX_KEEPALIVE = 20
+_HTTP_KEEPALIVE_EXPIRY = 300.0
+
+# Request timeout in seconds (matches the PostgREST client default)
+_HTTP_TIMEOUT = 120.0
+
+
+def create_client(supabase_url: str, supabase_key: str) -> "Client":
+    """Create a Supabase client, importing the supabase SDK on first use.
+    
+    The SDK pulls in httpx, gotrue, storage and realtime clients, so the
+    import is deferred until a connection is actually needed. The client is
+    given a pooled HTTP/2 httpx client with long-lived keep-alive connections.
+    
+    The injected httpx client (ClientOptions.httpx_client, supabase>=2.16)
+    replaces the SDK's per-service clients, so the ClientOptions timeouts
+    (postgrest_client_timeout, storage_client_timeout, ...) are ignored and
+    _HTTP_TIMEOUT applies to every service.
+    """
+    import httpx
+    from supabase import ClientOptions
+    from supabase import create_client as _create_client
     
-    return {"is_valid": True}
+    http_client = httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return _create_client(
+        supabase_url,
+        supabase_key,
+        options=ClientOptions(httpx_client=http_client)
+    )
+
+
+_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4)
+def _cached_client(supabase_url: str, supabase_key: str) -> "Client":
+    """Create and memoize one Supabase client per (url, key) pair."""
+    return create_client(supabase_url, supabase_key)
+
+
+def get_shared_client(supabase_url: str, supabase_key: str) -> "Client":
+    """Get the process-wide Supabase client for the given credentials.
+    
+    Managers created with the same credentials share one client, and with it
+    one underlying HTTP connection pool.
+    
+    Args:
+        supabase_url: Supabase project URL
+        supabase_key: Supabase API key (anon or service role)
+        
+    Returns:
+        Shared Supabase client instance
+    """
+    # The lock ensures concurrent first calls build a single client
+    with _client_lock:
+        return _cached_client(supabase_url, supabase_key)
 
 
 class SupabaseManager:
@@ -174,7 +384,7 @@ class SupabaseManager:
         """
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
-        self.client: Optional[Client] = None
+        self.client: Optional["Client"] = None
         
         # Validate credentials
         self._validate_credentials()
@@ -188,22 +398,23 @@ class SupabaseManager:
         if not self.supabase_key or not self.supabase_key.strip():
             raise ValueError("SUPABASE_ANON_KEY is required")
         
-        if not self.supabase_url.startswith("https://"):
+        url_parts = urlsplit(self.supabase_url)
+        if url_parts.scheme != "https" or not url_parts.hostname:
             raise ValueError("SUPABASE_URL must be a valid HTTPS URL")
         
-        if ".supabase.co" not in self.supabase_url:
+        if not url_parts.hostname.endswith(".supabase.co"):
             logger.warning("SUPABASE_URL does not appear to be a valid Supabase URL")
     
     def initialize(self) -> None:
         """Initialize Supabase client connection."""
         try:
-            self.client = create_client(self.supabase_url, self.supabase_key)
+            self.client = get_shared_client(self.supabase_url, self.supabase_key)
             logger.info("Supabase client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Supabase client: {e}")
             raise RuntimeError(f"Supabase client initialization failed: {str(e)}")
     
-    def get_client(self) -> Client:
+    def get_client(self) -> "Client":
         """Get Supabase client, initializing if needed.
         
         Returns:
@@ -212,8 +423,11 @@ class SupabaseManager:
         Raises:
             RuntimeError: If client initialization fails
         """
-        if not self.client:
-            self.initialize()
+        client = self.client
+        if client is not None:
+            return client
+        
+        self.initialize()
         
         # After initialization, client should not be None
         if not self.client:
@@ -264,20 +478,14 @@ class SupabaseManager:
         if not validation["is_valid"]:
             raise ValueError(validation["error"])
         
+        handler = self._OPERATIONS.get(operation)
+        if handler is None:
+            raise ValueError(f"Unsupported operation: {operation}")
+        
         try:
             client = self.get_client()
             table = client.table(table_name)
-            
-            if operation == "select":
-                return self._execute_select(table, **kwargs)
-            elif operation == "insert":
-                return self._execute_insert(table, **kwargs)
-            elif operation == "update":
-                return self._execute_update(table, **kwargs)
-            elif operation == "delete":
-                return self._execute_delete(table, **kwargs)
-            else:
-                raise ValueError(f"Unsupported operation: {operation}")
+            return handler(self, table, **kwargs)
                 
         except ValueError:
             # Re-raise ValueError as-is (validation errors should not be wrapped)
@@ -297,8 +505,7 @@ class SupabaseManager:
             if not filter_validation["is_valid"]:
                 raise ValueError(filter_validation["error"])
             
-            for key, value in filters.items():
-                query = query.eq(key, value)
+            query = query.match(filters)
         
         # Apply limit
         limit = kwargs.get("limit", 100)
@@ -330,19 +537,13 @@ class SupabaseManager:
         if not updates:
             raise ValueError("Updates are required for update operation")
         
-        # Validate filters
-        filter_validation = validate_column_filters(filters)
-        if not filter_validation["is_valid"]:
-            raise ValueError(filter_validation["error"])
-        
-        # Validate updates
-        update_validation = validate_column_filters(updates)
-        if not update_validation["is_valid"]:
-            raise ValueError(update_validation["error"])
+        validation = validate_column_filters(filters)
+        if validation["is_valid"]:
+            validation = validate_column_data(updates)
+        if not validation["is_valid"]:
+            raise ValueError(validation["error"])
         
-        query = table.update(updates)
-        for key, value in filters.items():
-            query = query.eq(key, value)
+        query = table.update(updates).match(filters)
         
         return query.execute()
     
@@ -358,8 +559,14 @@ class SupabaseManager:
         if not filter_validation["is_valid"]:
             raise ValueError(filter_validation["error"])
         
-        query = table.delete()
-        for key, value in filters.items():
-            query = query.eq(key, value)
+        query = table.delete().match(filters)
         
-        return query.execute()
\ No newline at end of file
+        return query.execute()
+    
+    # Operation dispatch table used by execute_query
+    _OPERATIONS: ClassVar[Dict[str, Callable[..., Any]]] = {
+        "select": _execute_select,
+        "insert": _execute_insert,
+        "update": _execute_update,
+        "delete": _execute_delete,
+    }
\ No newline at end of file
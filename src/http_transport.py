@@ -6,19 +6,24 @@ for streaming responses, and session management capabilities.
 """
 
 import asyncio
-import json
+import heapq
+import importlib.util
 import logging
 import os
+import re
+import secrets
 import sys
-import uuid
-from typing import Any, AsyncGenerator, Dict, List, Optional
-from urllib.parse import urlparse
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel, ValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from .transport_base import TransportBase, TransportError
 
@@ -26,6 +31,44 @@ from .transport_base import TransportBase, TransportError
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger("supabase-mcp.http_transport")
 
+# Origins always accepted for local development: http(s) on localhost, any port
+_LOCALHOST_ORIGIN_RE = re.compile(
+    r"https?://(?:localhost|127\.0\.0\.1)(?::\d+)?", re.IGNORECASE
+)
+
+# httptools ships with uvicorn[standard]; without it uvicorn picks its own parser
+HTTP_PROTOCOL = "httptools" if importlib.util.find_spec("httptools") else "auto"
+
+# Idle time in seconds after which a session expires
+SESSION_TIMEOUT = 3600
+
+# Default maximum number of live sessions before the least recently used is evicted
+MAX_SESSIONS = 10000
+
+# Number of expired entries processed before cleanup yields to the event loop
+CLEANUP_BATCH_SIZE = 1000
+
+# Maximum number of bytes written per chunk of a streamed SSE frame; large
+# enough that typical results go out in one send, small enough to bound each
+# write for very large ones
+SSE_CHUNK_SIZE = 64 * 1024
+
+# Tools whose results are always streamed, as they may return large datasets
+_STREAM_METHODS = frozenset({"query_table", "list_tables", "describe_table"})
+
+# String results longer than this many characters are streamed via SSE
+STREAM_THRESHOLD = 5000
+
+# Default maximum accepted size in bytes of a JSON-RPC request body
+MAX_REQUEST_BODY_SIZE = 1024 * 1024
+
+# Default wall-clock limit in seconds for a single tool call
+TOOL_TIMEOUT = 30.0
+
+# Default maximum number of requests accepted in one JSON-RPC batch; each one
+# becomes a concurrent tool call, so larger batches are rejected outright
+MAX_BATCH_SIZE = 50
+
 
 class JsonRpcRequest(BaseModel):
     """JSON-RPC 2.0 request model."""
@@ -50,6 +93,91 @@ class JsonRpcError(BaseModel):
     data: Optional[Any] = None
 
 
+@dataclass(slots=True)
+class _Session:
+    """Per-session bookkeeping (slotted to keep many sessions cheap)."""
+    created_at: float
+    last_seen: float
+    requests: int = 0
+
+
+def _validate_json_rpc_request(body: Any) -> Tuple[str, Dict[str, Any], Any]:
+    """Validate a decoded JSON-RPC 2.0 request without building models.
+    
+    The request shape is fixed and small, so a few type checks replace the
+    per-request JsonRpcRequest construction on the hot path.
+    
+    Args:
+        body: Decoded request (one element for batch requests)
+        
+    Returns:
+        Tuple of (method, params, request id)
+        
+    Raises:
+        ValueError: If the body is not a valid JSON-RPC 2.0 request
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Request must be a JSON object")
+    
+    if body.get("jsonrpc", "2.0") != "2.0":
+        raise ValueError("'jsonrpc' must be \"2.0\"")
+    
+    method = body.get("method")
+    if not isinstance(method, str):
+        raise ValueError("'method' must be a string")
+    
+    params = body.get("params")
+    if params is None:
+        params = {}
+    elif not isinstance(params, dict):
+        raise ValueError("'params' must be an object")
+    
+    request_id = body.get("id")
+    if request_id is not None and (
+        isinstance(request_id, bool) or not isinstance(request_id, (str, int, float))
+    ):
+        raise ValueError("'id' must be a string, number or null")
+    
+    return method, params, request_id
+
+
+def _error_payload(request_id: Any, code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    """Build a JSON-RPC 2.0 error response payload."""
+    error: Dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+# Parse errors carry no request id, so the body is constant and built once
+_PARSE_ERROR_BODY = orjson.dumps(_error_payload(None, -32700, "Invalid JSON"))
+
+
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "transport": "http"})
+
+
+async def _health_check(request: Request) -> Response:
+    """Health check endpoint."""
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+class _OrjsonResponse(Response):
+    """JSON response rendered with orjson instead of the stdlib encoder."""
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def _json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Serialize a JSON payload with orjson directly into a response."""
+    return _OrjsonResponse(content, status_code=status_code, headers=headers)
+
+
 class HttpTransport(TransportBase):
     """FastAPI-based HTTP transport implementing MCP streamable HTTP protocol.
     
@@ -66,7 +194,11 @@ class HttpTransport(TransportBase):
         mcp_server: Any,
         host: str = "127.0.0.1",
         port: int = 8000,
-        cors_origins: Optional[List[str]] = None
+        cors_origins: Optional[List[str]] = None,
+        max_body_size: int = MAX_REQUEST_BODY_SIZE,
+        max_sessions: int = MAX_SESSIONS,
+        tool_timeout: Optional[float] = TOOL_TIMEOUT,
+        max_batch_size: int = MAX_BATCH_SIZE
     ):
         """Initialize HTTP transport.
         
@@ -75,14 +207,28 @@ class HttpTransport(TransportBase):
             host: Host to bind to (default: 127.0.0.1 for security)
             port: Port to listen on
             cors_origins: Allowed CORS origins for web-based clients
+            max_body_size: Maximum request body size in bytes (larger get 413)
+            max_sessions: Maximum number of live sessions kept in memory
+            tool_timeout: Seconds a tool call may run before it is cancelled
+                and answered with an internal error (None disables the limit)
+            max_batch_size: Maximum number of requests in a JSON-RPC batch
         """
         super().__init__(mcp_server)
         self.host = host
         self.port = port
         self.cors_origins = cors_origins or ["http://localhost:3000"]
+        self.max_body_size = max_body_size
+        self.max_sessions = max_sessions
+        self.tool_timeout = tool_timeout
+        self.max_batch_size = max_batch_size
+        self._allowed_origins = frozenset(self.cors_origins)
         
         # Session management
-        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._sessions: Dict[str, _Session] = {}
+        # Min-heap of (last known activity time, session id) for expiry
+        self._session_expiry: List[Tuple[float, str]] = []
+        # Serialized GET /mcp body, built on first request once tools are registered
+        self._info_body: Optional[bytes] = None
         
         # FastAPI app
         self.app = FastAPI(
@@ -90,7 +236,8 @@ class HttpTransport(TransportBase):
             description="Model Context Protocol server with streamable HTTP transport",
             version="0.1.0",
             docs_url=None,  # Disable docs for security
-            redoc_url=None  # Disable redoc for security
+            redoc_url=None,  # Disable redoc for security
+            default_response_class=_OrjsonResponse
         )
         
         # Configure CORS
@@ -105,11 +252,22 @@ class HttpTransport(TransportBase):
         # Setup routes
         self._setup_routes()
         
-        logger.info(f"HTTP transport initialized on {host}:{port}")
+        logger.info("HTTP transport initialized on %s:%s", host, port)
     
     def _setup_routes(self) -> None:
         """Setup FastAPI routes following MCP streamable HTTP specification."""
         
+        @self.app.exception_handler(StarletteHTTPException)
+        async def http_exception_handler(
+            request: Request, exc: StarletteHTTPException
+        ) -> Response:
+            """Render HTTP errors (403, 404, 413, ...) with orjson as well."""
+            return _json_response(
+                {"detail": exc.detail},
+                status_code=exc.status_code,
+                headers=exc.headers
+            )
+        
         @self.app.post("/mcp")
         async def mcp_endpoint(request: Request) -> Response:
             """Main MCP endpoint following JSON-RPC 2.0 specification.
@@ -120,118 +278,197 @@ class HttpTransport(TransportBase):
             # Security: Validate Origin header
             origin = request.headers.get("origin")
             if origin and not self._is_valid_origin(origin):
-                logger.warning(f"Invalid origin rejected: {origin}")
+                logger.warning("Invalid origin rejected: %s", origin)
                 raise HTTPException(status_code=403, detail="Invalid origin")
             
             try:
-                # Parse JSON-RPC request
-                body = await request.json()
-                rpc_request = JsonRpcRequest(**body)
-                
-                logger.debug(f"MCP request: {rpc_request.method}")
-                
-                # Handle session management
-                session_id = self._handle_session(request)
-                
-                # Route to MCP tool
-                try:
-                    result = await self.invoke_tool(
-                        rpc_request.method,
-                        rpc_request.params or {}
-                    )
-                    
-                    # Check if response should be streamed
-                    if self._should_stream(rpc_request.method, result):
-                        return self._create_sse_response(result, rpc_request.id, session_id)
-                    else:
-                        # Standard JSON-RPC response
-                        response = JsonRpcResponse(
-                            id=rpc_request.id,
-                            result=result
-                        )
-                        json_response = JSONResponse(response.model_dump())
-                        
-                        # Add session header if session exists
-                        if session_id:
-                            json_response.headers["Mcp-Session-Id"] = session_id
-                        
-                        return json_response
-                        
-                except ValueError as e:
-                    # Tool not found or validation error
-                    error = JsonRpcError(
-                        code=-32601,  # Method not found
-                        message=str(e)
-                    )
-                    response = JsonRpcResponse(
-                        id=rpc_request.id,
-                        error=error.model_dump()
-                    )
-                    return JSONResponse(
-                        response.model_dump(),
-                        status_code=404
-                    )
-                    
-                except Exception as e:
-                    # Internal error
-                    logger.error(f"Tool execution failed: {e}")
-                    error = JsonRpcError(
-                        code=-32603,  # Internal error
-                        message=f"Tool execution failed: {str(e)}"
-                    )
-                    response = JsonRpcResponse(
-                        id=rpc_request.id,
-                        error=error.model_dump()
-                    )
-                    return JSONResponse(
-                        response.model_dump(),
-                        status_code=500
-                    )
-                    
-            except ValidationError as e:
-                # Invalid JSON-RPC request
-                logger.warning(f"Invalid JSON-RPC request: {e}")
-                error = JsonRpcError(
-                    code=-32600,  # Invalid Request
-                    message="Invalid JSON-RPC request",
-                    data=e.errors()
-                )
-                response = JsonRpcResponse(error=error.model_dump())
-                return JSONResponse(
-                    response.model_dump(),
-                    status_code=400
-                )
-                
-            except json.JSONDecodeError:
-                # Invalid JSON
-                error = JsonRpcError(
-                    code=-32700,  # Parse error
-                    message="Invalid JSON"
+                body = orjson.loads(await self._read_body(request))
+            except orjson.JSONDecodeError:
+                # Invalid JSON (parse error, -32700)
+                return Response(
+                    content=_PARSE_ERROR_BODY,
+                    status_code=400,
+                    media_type="application/json"
                 )
-                response = JsonRpcResponse(error=error.model_dump())
-                return JSONResponse(
-                    response.model_dump(),
+            
+            # JSON-RPC batch; an empty array is an invalid request below
+            if isinstance(body, list) and body:
+                return await self._handle_batch(request, body)
+            
+            try:
+                method, params, request_id = _validate_json_rpc_request(body)
+            except ValueError as e:
+                # Invalid JSON-RPC request
+                logger.warning("Invalid JSON-RPC request: %s", e)
+                return _json_response(
+                    _error_payload(
+                        None,
+                        -32600,  # Invalid Request
+                        "Invalid JSON-RPC request",
+                        str(e)
+                    ),
                     status_code=400
                 )
+            
+            logger.debug("MCP request: %s", method)
+            
+            # Route to MCP tool
+            status_code, payload = await self._dispatch(method, params, request_id)
+            if status_code != 200:
+                return _json_response(payload, status_code=status_code)
+            
+            # Handle session management; only successful calls return a session
+            # ID, so failed requests never allocate one
+            session_id = self._handle_session(request)
+            
+            # Check if response should be streamed
+            result = payload["result"]
+            if self._should_stream(method, result):
+                return self._create_sse_response(result, request_id, session_id)
+            
+            # Standard JSON-RPC response
+            headers = {"Mcp-Session-Id": session_id} if session_id else None
+            return _json_response(payload, headers=headers)
         
         @self.app.get("/mcp")
-        async def mcp_info() -> Dict[str, Any]:
+        async def mcp_info() -> Response:
             """Provide basic server information for GET requests."""
-            tools = self.get_available_tools()
-            return {
-                "server": "Supabase MCP Server",
-                "transport": "streamable-http",
-                "protocol": "2025-03-26",
-                "tools": list(tools.keys()),
-                "endpoints": {
-                    "mcp": "/mcp (POST for JSON-RPC, GET for info)"
-                }
-            }
-        
-        @self.app.get("/health")
-        async def health_check() -> Dict[str, str]:
-            """Health check endpoint."""
-            return {"status": "healthy", "transport": "http"}
+            # The tool registry is static after startup, so serialize once
+            if self._info_body is None:
+                tools = self.get_available_tools()
+                self._info_body = orjson.dumps({
+                    "server": "Supabase MCP Server",
+                    "transport": "streamable-http",
+                    "protocol": "2025-03-26",
+                    "tools": list(tools.keys()),
+                    "endpoints": {
+                        "mcp": "/mcp (POST for JSON-RPC, GET for info)"
+                    }
+                })
+            return Response(content=self._info_body, media_type="application/json")
+        
+        # Plain Starlette route: skips FastAPI's per-request dependency and
+        # parameter handling for an endpoint polled by load balancers
+        self.app.add_route("/health", _health_check, methods=["GET"], include_in_schema=False)
+    
+    async def _dispatch(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        request_id: Any
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Invoke a tool and build its JSON-RPC response payload.
+        
+        Args:
+            method: MCP tool method name
+            params: Tool parameters
+            request_id: JSON-RPC request ID
+            
+        Returns:
+            Tuple of (HTTP status for a single request, response payload)
+        """
+        # A hung tool must not hold its request (and event loop slot) forever
+        deadline = asyncio.timeout(self.tool_timeout)
+        try:
+            async with deadline:
+                result = await self.invoke_tool(method, params)
+        except ValueError as e:
+            # Tool not found or validation error
+            return 404, _error_payload(request_id, -32601, str(e))  # Method not found
+        except Exception as e:
+            # Internal error
+            if deadline.expired():
+                logger.error("Tool %s timed out after %ss", method, self.tool_timeout)
+                message = f"Tool execution timed out after {self.tool_timeout}s"
+            else:
+                logger.error("Tool execution failed: %s", e)
+                message = f"Tool execution failed: {str(e)}"
+            return 500, _error_payload(request_id, -32603, message)  # Internal error
+        
+        return 200, {"jsonrpc": "2.0", "id": request_id, "result": result}
+    
+    async def _handle_batch(self, request: Request, messages: List[Any]) -> Response:
+        """Handle a JSON-RPC batch, running its tool calls concurrently.
+        
+        Requests get their responses in request order; invalid elements get an
+        Invalid Request error without affecting the others. Notifications
+        (requests without an "id") are executed but never answered, and a
+        batch of only notifications is acknowledged with 202 and no body.
+        Batch results are always returned as one JSON array, never streamed.
+        
+        Args:
+            request: FastAPI request object
+            messages: Non-empty list of decoded JSON-RPC requests
+            
+        Returns:
+            Response with the array of JSON-RPC responses
+        """
+        if len(messages) > self.max_batch_size:
+            logger.warning("Rejected JSON-RPC batch of %d requests", len(messages))
+            return _json_response(
+                _error_payload(
+                    None,
+                    -32600,  # Invalid Request
+                    "Invalid JSON-RPC request",
+                    f"Batch exceeds {self.max_batch_size} requests"
+                ),
+                status_code=400
+            )
+        
+        async def dispatch(message: Any) -> Tuple[int, Optional[Dict[str, Any]]]:
+            try:
+                method, params, request_id = _validate_json_rpc_request(message)
+            except ValueError as e:
+                return 400, _error_payload(None, -32600, "Invalid JSON-RPC request", str(e))
+            status_code, payload = await self._dispatch(method, params, request_id)
+            # Notifications must not be answered, not even with an error
+            return status_code, payload if "id" in message else None
+        
+        results = await asyncio.gather(*map(dispatch, messages))
+        
+        # As for single requests, only a successful call yields a session
+        session_id = None
+        if any(status_code == 200 for status_code, _ in results):
+            session_id = self._handle_session(request)
+        
+        headers = {"Mcp-Session-Id": session_id} if session_id else None
+        responses = [payload for _, payload in results if payload is not None]
+        if not responses:
+            return Response(status_code=202, headers=headers)
+        return _json_response(responses, headers=headers)
+    
+    def refresh_tools(self) -> None:
+        """Discard cached tool lookups, including the GET /mcp info body."""
+        super().refresh_tools()
+        self._info_body = None
+    
+    async def _read_body(self, request: Request) -> bytearray:
+        """Read the request body while enforcing the configured size limit.
+        
+        The declared Content-Length is checked up front, and the body is then
+        received chunk by chunk so an undeclared or dishonest length cannot
+        buffer more than the limit in memory.
+        
+        Args:
+            request: FastAPI request object
+            
+        Returns:
+            Raw request body
+            
+        Raises:
+            HTTPException: 413 if the body exceeds the size limit
+        """
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        
+        body = bytearray()
+        async for chunk in request.stream():
+            body += chunk
+            if len(body) > self.max_body_size:
+                raise HTTPException(status_code=413, detail="Request body too large")
+        
+        return body
     
     def _handle_session(self, request: Request) -> Optional[str]:
         """Handle session management via Mcp-Session-Id header.
@@ -243,29 +480,49 @@ class HttpTransport(TransportBase):
             Session ID if session management is enabled
         """
         session_id = request.headers.get("mcp-session-id")
+        now = time.monotonic()
         
         if session_id:
-            # Validate existing session
-            if session_id not in self._sessions:
-                logger.warning(f"Invalid session ID: {session_id}")
+            # Validate and update existing session with a single lookup
+            session = self._sessions.get(session_id)
+            if session is None:
+                logger.warning("Invalid session ID: %s", session_id)
                 return None
-            logger.debug(f"Using existing session: {session_id}")
+            session.requests += 1
+            session.last_seen = now
+            logger.debug("Using existing session: %s", session_id)
         else:
             # Create new session (optional for MCP compatibility)
-            session_id = str(uuid.uuid4())
-            self._sessions[session_id] = {
-                "created_at": asyncio.get_event_loop().time(),
-                "requests": 0
-            }
-            logger.debug(f"Created new session: {session_id}")
-        
-        # Update session stats
-        if session_id in self._sessions:
-            self._sessions[session_id]["requests"] += 1
-            self._sessions[session_id]["last_seen"] = asyncio.get_event_loop().time()
+            if len(self._sessions) >= self.max_sessions:
+                self._evict_session()
+            session_id = secrets.token_urlsafe(16)
+            self._sessions[session_id] = _Session(created_at=now, last_seen=now, requests=1)
+            heapq.heappush(self._session_expiry, (now, session_id))
+            logger.debug("Created new session: %s", session_id)
         
         return session_id
     
+    def _evict_session(self) -> None:
+        """Evict the least recently used session to make room for a new one.
+        
+        Heap entries whose session was used after they were scheduled are
+        re-scheduled at the newer time, so every live session keeps exactly
+        one heap entry and the first up-to-date entry is the oldest session.
+        """
+        while self._session_expiry:
+            scheduled, session_id = heapq.heappop(self._session_expiry)
+            session = self._sessions.get(session_id)
+            if session is None:
+                continue
+            
+            if session.last_seen > scheduled:
+                heapq.heappush(self._session_expiry, (session.last_seen, session_id))
+                continue
+            
+            del self._sessions[session_id]
+            logger.debug("Evicted least recently used session: %s", session_id)
+            return
+    
     def _is_valid_origin(self, origin: str) -> bool:
         """Validate request origin for security.
         
@@ -278,19 +535,12 @@ class HttpTransport(TransportBase):
         if not origin:
             return True  # No origin header is okay
         
-        try:
-            parsed = urlparse(origin)
-            
-            # Allow localhost for development
-            if parsed.hostname in ["localhost", "127.0.0.1"]:
-                return True
-            
-            # Check configured CORS origins
-            return origin in self.cors_origins
-            
-        except Exception:
-            logger.warning(f"Failed to parse origin: {origin}")
-            return False
+        # Check configured CORS origins (exact match, no parsing needed)
+        if origin in self._allowed_origins:
+            return True
+        
+        # Allow localhost for development
+        return _LOCALHOST_ORIGIN_RE.fullmatch(origin) is not None
     
     def _should_stream(self, method: str, result: Any) -> bool:
         """Determine if response should be streamed via SSE.
@@ -302,16 +552,9 @@ class HttpTransport(TransportBase):
         Returns:
             True if response should be streamed
         """
-        # Stream for large results or specific methods
-        if isinstance(result, str) and len(result) > 5000:
-            return True
-        
-        # Stream for specific methods that might return large datasets
-        streaming_methods = {"query_table", "list_tables", "describe_table"}
-        if method in streaming_methods:
-            return True
-        
-        return False
+        return method in _STREAM_METHODS or (
+            isinstance(result, str) and len(result) > STREAM_THRESHOLD
+        )
     
     def _create_sse_response(
         self, 
@@ -329,38 +572,35 @@ class HttpTransport(TransportBase):
         Returns:
             StreamingResponse with SSE format
         """
-        async def event_generator() -> AsyncGenerator[str, None]:
+        async def event_generator() -> AsyncGenerator[bytes, None]:
             try:
-                # Send result as SSE event
-                response_data = JsonRpcResponse(
-                    id=request_id,
-                    result=result
-                ).model_dump()
+                # Send result as a single SSE event, encoded straight to bytes
+                response_data = {"jsonrpc": "2.0", "id": request_id, "result": result}
+                frame = b"data: " + orjson.dumps(response_data) + b"\n\n"
                 
-                # Format as SSE event
-                event_data = json.dumps(response_data)
-                yield f"data: {event_data}\n\n"
+                # Write large frames in slices so the server can flush them
+                # progressively instead of in one oversized send
+                view = memoryview(frame)
+                for offset in range(0, len(view), SSE_CHUNK_SIZE):
+                    yield bytes(view[offset:offset + SSE_CHUNK_SIZE])
                 
-                logger.debug(f"SSE response sent for request ID: {request_id}")
+                logger.debug("SSE response sent for request ID: %s", request_id)
                 
             except Exception as e:
                 # Send error as SSE event
-                logger.error(f"SSE streaming error: {e}")
-                error_response = JsonRpcResponse(
-                    id=request_id,
-                    error=JsonRpcError(
-                        code=-32603,
-                        message=f"Streaming error: {str(e)}"
-                    ).model_dump()
-                ).model_dump()
-                
-                error_data = json.dumps(error_response)
-                yield f"data: {error_data}\n\n"
+                logger.error("SSE streaming error: %s", e)
+                error_response = _error_payload(
+                    request_id,
+                    -32603,
+                    f"Streaming error: {str(e)}"
+                )
+                yield b"data: " + orjson.dumps(error_response) + b"\n\n"
         
         headers = {
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "Content-Type": "text/event-stream",
+            "X-Accel-Buffering": "no",  # Stop reverse proxies buffering the stream
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "Content-Type"
         }
@@ -374,19 +614,36 @@ class HttpTransport(TransportBase):
             headers=headers
         )
     
-    def _cleanup_sessions(self) -> None:
-        """Clean up expired sessions."""
-        current_time = asyncio.get_event_loop().time()
-        session_timeout = 3600  # 1 hour
+    async def _cleanup_sessions(self) -> None:
+        """Clean up expired sessions.
         
-        expired_sessions = [
-            session_id for session_id, session_data in self._sessions.items()
-            if current_time - session_data.get("last_seen", 0) > session_timeout
-        ]
+        Sessions are popped from a min-heap keyed on the last activity time
+        known when they were (re)scheduled, so the sweep stops at the first
+        session that cannot have expired instead of scanning every session.
+        Large sweeps yield to the event loop every CLEANUP_BATCH_SIZE entries
+        so request handling is not stalled.
+        """
+        current_time = time.monotonic()
+        processed = 0
         
-        for session_id in expired_sessions:
-            del self._sessions[session_id]
-            logger.debug(f"Expired session cleaned up: {session_id}")
+        while self._session_expiry and current_time - self._session_expiry[0][0] > SESSION_TIMEOUT:
+            processed += 1
+            if processed % CLEANUP_BATCH_SIZE == 0:
+                await asyncio.sleep(0)
+                continue
+            
+            _, session_id = heapq.heappop(self._session_expiry)
+            session = self._sessions.get(session_id)
+            if session is None:
+                continue
+            
+            last_seen = session.last_seen
+            if current_time - last_seen > SESSION_TIMEOUT:
+                del self._sessions[session_id]
+                logger.debug("Expired session cleaned up: %s", session_id)
+            else:
+                # Session was active since it was scheduled; re-schedule it
+                heapq.heappush(self._session_expiry, (last_seen, session_id))
     
     async def start(self) -> None:
         """Start the HTTP transport server."""
@@ -394,14 +651,18 @@ class HttpTransport(TransportBase):
             # Get configuration from environment
             host = os.getenv("HTTP_HOST", self.host)
             port = int(os.getenv("HTTP_PORT", self.port))
+            limit_concurrency = os.getenv("HTTP_LIMIT_CONCURRENCY")
             
-            logger.info(f"Starting HTTP server on {host}:{port}")
+            logger.info("Starting HTTP server on %s:%s", host, port)
             
-            # Configure uvicorn
+            # Configure uvicorn. The event loop is the caller's, since
+            # serve() runs inside it.
             config = uvicorn.Config(
                 app=self.app,
                 host=host,
                 port=port,
+                http=HTTP_PROTOCOL,
+                limit_concurrency=int(limit_concurrency) if limit_concurrency else None,
                 log_level="info",
                 access_log=False,  # Reduce noise
                 server_header=False,  # Security
@@ -423,7 +684,7 @@ class HttpTransport(TransportBase):
                 await asyncio.sleep(0.1)
                 
         except Exception as e:
-            logger.error(f"Failed to start HTTP transport: {e}")
+            logger.error("Failed to start HTTP transport: %s", e)
             raise TransportError(
                 f"HTTP transport startup failed: {str(e)}", 
                 "http",
@@ -451,20 +712,21 @@ class HttpTransport(TransportBase):
             
             # Clean up sessions
             self._sessions.clear()
+            self._session_expiry.clear()
             
             logger.info("HTTP transport stopped")
             
         except Exception as e:
-            logger.error(f"Error stopping HTTP transport: {e}")
+            logger.error("Error stopping HTTP transport: %s", e)
     
     async def _session_cleanup_loop(self) -> None:
         """Background task to clean up expired sessions."""
         while True:
             try:
                 await asyncio.sleep(300)  # Clean up every 5 minutes
-                self._cleanup_sessions()
+                await self._cleanup_sessions()
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Session cleanup error: {e}")
+                logger.error("Session cleanup error: %s", e)
                 await asyncio.sleep(60)  # Wait before retry
\ No newline at end of file
@@ -7,12 +7,16 @@ with built-in Row Level Security and comprehensive input validation.
 
 import argparse
 import asyncio
-import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
 
 # Add the project root to Python path for imports
 project_root = Path(__file__).parent.parent
@@ -31,6 +35,7 @@ try:
         RecordUpdateRequest,
         validate_table_name,
         validate_column_filters,
+        validate_column_data,
     )
 except ImportError:
     # Fallback to absolute import (for direct execution)
@@ -41,6 +46,7 @@ except ImportError:
         RecordUpdateRequest,
         validate_table_name,
         validate_column_filters,
+        validate_column_data,
     )
 
 # CRITICAL: Configure logging to stderr only (never stdout - corrupts MCP JSON-RPC)
@@ -50,10 +56,14 @@ logger = logging.getLogger("supabase-mcp")
 # Load environment variables from .env file
 load_dotenv()
 
+# Environment variables that must be set to a non-empty value
+_REQUIRED_ENV_VARS = ("SUPABASE_URL", "SUPABASE_ANON_KEY")
+
+
 def validate_environment() -> None:
     """Validate required environment variables."""
-    required_vars = ["SUPABASE_URL", "SUPABASE_ANON_KEY"]
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    environ = os.environ
+    missing_vars = [var for var in _REQUIRED_ENV_VARS if not environ.get(var)]
     
     if missing_vars:
         error_msg = f"Missing required environment variables: {missing_vars}"
@@ -62,6 +72,16 @@ def validate_environment() -> None:
     
     logger.info("Environment variables validated successfully")
 
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Server configuration, read from the environment once at import."""
+    log_level: str
+    server_name: str
+    max_query_limit: int
+    debug: bool
+
+
 def get_config() -> Dict[str, Any]:
     """Get configuration from environment variables."""
     return {
@@ -73,49 +93,155 @@ def get_config() -> Dict[str, Any]:
 
 # Validate environment before proceeding
 validate_environment()
-config = get_config()
+config = Config(**get_config())
+
+# Hard cap on rows returned by query_table
+_MAX_QUERY_LIMIT = config.max_query_limit
 
 # Update logging level if specified
-if config["log_level"]:
-    logger.setLevel(getattr(logging, config["log_level"].upper()))
+if config.log_level:
+    logger.setLevel(getattr(logging, config.log_level.upper()))
 
 # Initialize FastMCP server
-mcp = FastMCP(config["server_name"])
+mcp = FastMCP(config.server_name)
 
-# Initialize Supabase manager with environment credentials
+# Initialize Supabase manager with environment credentials (presence and
+# non-emptiness were checked by validate_environment above)
 try:
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_ANON_KEY")
-    
-    if not supabase_url or not supabase_key:
-        raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
-    
     supabase_manager = SupabaseManager(
-        supabase_url=supabase_url,
-        supabase_key=supabase_key
+        supabase_url=os.environ["SUPABASE_URL"],
+        supabase_key=os.environ["SUPABASE_ANON_KEY"]
     )
     logger.info("Supabase manager initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize Supabase manager: {e}")
     raise
 
+# Worker threads for the synchronous supabase-py calls, so concurrent tool
+# invocations overlap their network round-trips instead of blocking the loop
+_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="supabase")
+
+
+async def _run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking Supabase call in the worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, partial(fn, *args, **kwargs))
+
+
+def _execute_sql(params: Dict[str, Any]) -> Any:
+    """Run an execute_sql RPC on the shared client (blocking)."""
+    return supabase_manager.get_client().rpc('execute_sql', params).execute()
+
+
+def _fetch_sample_row(table_name: str) -> Any:
+    """Fetch a single row of a table on the shared client (blocking)."""
+    return supabase_manager.get_client().table(table_name).select("*").limit(1).execute()
+
+
+# Query information_schema to get user tables (not system tables)
+# Note: Supabase uses PostgreSQL, so we can use standard information_schema
+_LIST_TABLES_SQL = """
+    SELECT 
+        table_name,
+        table_type,
+        table_schema
+    FROM information_schema.tables 
+    WHERE table_schema = 'public'
+    AND table_type = 'BASE TABLE'
+    ORDER BY table_name
+"""
+_LIST_TABLES_RPC_PARAMS = {'query': _LIST_TABLES_SQL}
+
+# Query information_schema for column and constraint (primary keys,
+# foreign keys, etc.) information in a single round-trip; the row's
+# schema_info column holds {"columns": [...], "constraints": [...]}
+_DESCRIBE_TABLE_SQL = """
+    SELECT json_build_object(
+        'columns', COALESCE((
+            SELECT json_agg(c ORDER BY c.ordinal_position)
+            FROM (
+                SELECT 
+                    column_name,
+                    data_type,
+                    is_nullable,
+                    column_default,
+                    character_maximum_length,
+                    numeric_precision,
+                    numeric_scale,
+                    ordinal_position
+                FROM information_schema.columns 
+                WHERE table_schema = 'public' 
+                AND table_name = %s
+            ) c
+        ), '[]'::json),
+        'constraints', COALESCE((
+            SELECT json_agg(x)
+            FROM (
+                SELECT 
+                    tc.constraint_type,
+                    tc.constraint_name,
+                    kcu.column_name,
+                    ccu.table_name AS foreign_table_name,
+                    ccu.column_name AS foreign_column_name
+                FROM information_schema.table_constraints tc
+                LEFT JOIN information_schema.key_column_usage kcu 
+                    ON tc.constraint_name = kcu.constraint_name
+                LEFT JOIN information_schema.constraint_column_usage ccu 
+                    ON tc.constraint_name = ccu.constraint_name
+                WHERE tc.table_schema = 'public' 
+                AND tc.table_name = %s
+            ) x
+        ), '[]'::json)
+    ) AS schema_info
+"""
+
+# Columns that update_record refuses to modify (common security practice)
+_PROTECTED_UPDATE_COLUMNS = ("id", "created_at", "updated_at")
+
+# Maximum length of a string value written by insert_record/update_record
+_MAX_VALUE_LENGTH = 10000
+
+
+def _find_oversized_value(values: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """Return (column, length) of the first string value over the limit, if any."""
+    return next(
+        ((key, len(value)) for key, value in values.items()
+         if type(value) is str and len(value) > _MAX_VALUE_LENGTH),
+        None
+    )
+
+
+@dataclass(slots=True)
+class _QueryPayload:
+    """query_table result data; orjson serializes slotted dataclasses natively."""
+    table: str
+    record_count: int
+    limit_applied: int
+    filters_applied: Dict[str, Any]
+    records: List[Dict[str, Any]]
+
+
+# Pretty-printed JSON for response bodies; non-string keys are stringified
+# like json.dumps does, and unknown types (Decimal, ...) fall back to str()
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def _dumps(data: Any) -> str:
+    """Serialize data as indented JSON text using orjson."""
+    return orjson.dumps(data, default=str, option=_JSON_OPTIONS).decode()
+
+
 def create_error_response(message: str, details: Optional[Dict[str, Any]] = None) -> str:
     """Create standardized error response."""
-    error_text = f"**Error**\n\n{message}"
-    
-    if details:
-        error_text += f"\n\n**Details:**\n```json\n{json.dumps(details, indent=2, default=str)}\n```"
-    
-    return error_text
+    if not details:
+        return f"**Error**\n\n{message}"
+    return f"**Error**\n\n{message}\n\n**Details:**\n```json\n{_dumps(details)}\n```"
 
 def create_success_response(message: str, data: Any = None) -> str:
     """Create standardized success response."""
-    success_text = f"**Success**\n\n{message}"
-    
-    if data is not None:
-        success_text += f"\n\n**Data:**\n```json\n{json.dumps(data, indent=2, default=str)}\n```"
-    
-    return success_text
+    if data is None:
+        return f"**Success**\n\n{message}"
+    return f"**Success**\n\n{message}\n\n**Data:**\n```json\n{_dumps(data)}\n```"
 
 
 @mcp.tool()
@@ -127,35 +253,22 @@ async def list_tables() -> str:
     """
     try:
         logger.info("Executing list_tables tool")
-        client = supabase_manager.get_client()
-        
-        # Query information_schema to get user tables (not system tables)
-        # Note: Supabase uses PostgreSQL, so we can use standard information_schema
-        query = """
-        SELECT 
-            table_name,
-            table_type,
-            table_schema
-        FROM information_schema.tables 
-        WHERE table_schema = 'public'
-        AND table_type = 'BASE TABLE'
-        ORDER BY table_name
-        """
-        
-        # Use a raw SQL query for information_schema access
-        result = client.rpc('execute_sql', {'query': query}).execute()
+        # Use a raw SQL query for information_schema access; the client is
+        # fetched in the worker since its first creation blocks
+        result = await _run_blocking(_execute_sql, _LIST_TABLES_RPC_PARAMS)
         
         if not result.data:
             return "**No accessible tables found**\n\nThe database appears to be empty or you may not have permission to view tables."
         
         # Format the table information
-        tables_info = []
-        for table in result.data:
-            tables_info.append({
+        tables_info = [
+            {
                 "name": table.get("table_name"),
-                "type": table.get("table_type", "TABLE"), 
+                "type": table.get("table_type", "TABLE"),
                 "schema": table.get("table_schema", "public")
-            })
+            }
+            for table in result.data
+        ]
         
         return create_success_response(
             f"Found {len(tables_info)} accessible table(s)",
@@ -167,11 +280,11 @@ async def list_tables() -> str:
         # Try fallback method using Supabase client directly
         try:
             logger.info("Attempting fallback table listing method")
-            client = supabase_manager.get_client()
+            await _run_blocking(supabase_manager.get_client)
             
             # Alternative approach: try to access a common table to test connection
             # This is a simplified approach when information_schema access is limited
-            connection_test = supabase_manager.test_connection()
+            connection_test = await _run_blocking(supabase_manager.test_connection)
             
             if connection_test["status"] == "connected":
                 return create_error_response(
@@ -213,7 +326,7 @@ async def query_table(table_name: str, limit: Optional[int] = None, filters: Opt
         
         # Create and validate request using Pydantic model
         try:
-            request = TableQueryRequest(
+            request = TableQueryRequest.cached(
                 table_name=table_name,
                 limit=limit,
                 filters=filters
@@ -235,10 +348,11 @@ async def query_table(table_name: str, limit: Optional[int] = None, filters: Opt
         
         # Set reasonable default and maximum limits
         query_limit = request.limit or 100
-        query_limit = min(query_limit, config["max_query_limit"])
+        query_limit = min(query_limit, _MAX_QUERY_LIMIT)
         
         # Execute query using SupabaseManager
-        result = supabase_manager.execute_query(
+        result = await _run_blocking(
+            supabase_manager.execute_query,
             table_name=request.table_name,
             operation="select",
             filters=request.filters,
@@ -247,7 +361,7 @@ async def query_table(table_name: str, limit: Optional[int] = None, filters: Opt
         )
         
         if not result.data:
-            return f"**No data found**\n\nTable '{request.table_name}' exists but no records match the given criteria.\n\n**Query Details:**\n- Limit: {query_limit}\n- Filters: {json.dumps(request.filters or {}, indent=2)}"
+            return f"**No data found**\n\nTable '{request.table_name}' exists but no records match the given criteria.\n\n**Query Details:**\n- Limit: {query_limit}\n- Filters: {_dumps(request.filters or {})}"
         
         # Format and return results
         record_count = len(result.data)
@@ -256,13 +370,13 @@ async def query_table(table_name: str, limit: Optional[int] = None, filters: Opt
         if request.filters:
             response_message += " (filtered)"
         
-        return create_success_response(response_message, {
-            "table": request.table_name,
-            "record_count": record_count,
-            "limit_applied": query_limit,
-            "filters_applied": request.filters or {},
-            "records": result.data
-        })
+        return create_success_response(response_message, _QueryPayload(
+            table=request.table_name,
+            record_count=record_count,
+            limit_applied=query_limit,
+            filters_applied=request.filters or {},
+            records=result.data
+        ))
         
     except ValueError as e:
         logger.error(f"Validation error in query_table: {e}")
@@ -305,60 +419,18 @@ async def describe_table(table_name: str) -> str:
                 {"error": validation["error"]}
             )
         
-        client = supabase_manager.get_client()
-        
-        # Query information_schema for detailed column information
-        column_query = """
-        SELECT 
-            column_name,
-            data_type,
-            is_nullable,
-            column_default,
-            character_maximum_length,
-            numeric_precision,
-            numeric_scale,
-            ordinal_position
-        FROM information_schema.columns 
-        WHERE table_schema = 'public' 
-        AND table_name = %s
-        ORDER BY ordinal_position
-        """
-        
-        # Query for constraints (primary keys, foreign keys, etc.)
-        constraint_query = """
-        SELECT 
-            tc.constraint_type,
-            tc.constraint_name,
-            kcu.column_name,
-            ccu.table_name AS foreign_table_name,
-            ccu.column_name AS foreign_column_name
-        FROM information_schema.table_constraints tc
-        LEFT JOIN information_schema.key_column_usage kcu 
-            ON tc.constraint_name = kcu.constraint_name
-        LEFT JOIN information_schema.constraint_column_usage ccu 
-            ON tc.constraint_name = ccu.constraint_name
-        WHERE tc.table_schema = 'public' 
-        AND tc.table_name = %s
-        """
-        
         try:
-            # Get column information
-            columns_result = client.rpc('execute_sql', {
-                'query': column_query,
-                'params': [table_name]
-            }).execute()
-            
-            # Get constraint information  
-            constraints_result = client.rpc('execute_sql', {
-                'query': constraint_query,
-                'params': [table_name]
-            }).execute()
+            # Get column and constraint information
+            schema_result = await _run_blocking(_execute_sql, {
+                'query': _DESCRIBE_TABLE_SQL,
+                'params': [table_name, table_name]
+            })
             
         except Exception as e:
             logger.warning(f"RPC method failed, trying alternative approach: {e}")
             # Fallback: Try to query the table directly to at least get column info
             try:
-                sample_result = client.table(table_name).select("*").limit(1).execute()
+                sample_result = await _run_blocking(_fetch_sample_row, table_name)
                 
                 if sample_result.data and len(sample_result.data) > 0:
                     columns_info = []
@@ -398,38 +470,44 @@ async def describe_table(table_name: str) -> str:
                     }
                 )
         
+        schema_info = (schema_result.data[0].get("schema_info") if schema_result.data else None) or {}
+        columns_data = schema_info.get("columns") or []
+        constraints_data = schema_info.get("constraints") or []
+        
         # Process column information
-        if not columns_result.data:
+        if not columns_data:
             return create_error_response(
                 f"Table '{table_name}' not found",
                 {"suggestion": "Use list_tables tool to see available tables"}
             )
         
         columns_info = []
-        for col in columns_result.data:
+        append_column = columns_info.append
+        for col in columns_data:
+            get = col.get
             column_info = {
-                "name": col.get("column_name"),
-                "type": col.get("data_type"),
-                "nullable": col.get("is_nullable", "UNKNOWN") == "YES",
-                "default": col.get("column_default"),
-                "position": col.get("ordinal_position", 0)
+                "name": get("column_name"),
+                "type": get("data_type"),
+                "nullable": get("is_nullable") == "YES",
+                "default": get("column_default"),
+                "position": get("ordinal_position", 0)
             }
             
-            # Add length/precision info if available
-            if col.get("character_maximum_length"):
-                column_info["max_length"] = col.get("character_maximum_length")
+            # Add length/precision info if available (one lookup per field)
+            if max_length := get("character_maximum_length"):
+                column_info["max_length"] = max_length
             
-            if col.get("numeric_precision"):
-                column_info["precision"] = col.get("numeric_precision")
-                if col.get("numeric_scale"):
-                    column_info["scale"] = col.get("numeric_scale")
+            if precision := get("numeric_precision"):
+                column_info["precision"] = precision
+                if scale := get("numeric_scale"):
+                    column_info["scale"] = scale
             
-            columns_info.append(column_info)
+            append_column(column_info)
         
         # Process constraint information
         constraints_info = []
-        if constraints_result.data:
-            for constraint in constraints_result.data:
+        if constraints_data:
+            for constraint in constraints_data:
                 constraint_info = {
                     "type": constraint.get("constraint_type"),
                     "name": constraint.get("constraint_name"),
@@ -449,7 +527,7 @@ async def describe_table(table_name: str) -> str:
         schema_data = {
             "table_name": table_name,
             "column_count": len(columns_info),
-            "columns": sorted(columns_info, key=lambda x: x["position"]),
+            "columns": columns_info,  # Already in ordinal_position order
             "constraints": constraints_info
         }
         
@@ -486,6 +564,14 @@ async def insert_record(table_name: str, data: Dict[str, Any]) -> str:
     try:
         logger.info(f"Executing insert_record tool for table: {table_name}")
         
+        # Checked before the model, whose generic "at least one field" error
+        # would otherwise hide this more helpful message
+        if not data:
+            return create_error_response(
+                "No data provided for insertion",
+                {"example": {"name": "John Doe", "email": "john@example.com"}}
+            )
+        
         # Create and validate request using Pydantic model
         try:
             request = RecordInsertRequest(
@@ -499,15 +585,8 @@ async def insert_record(table_name: str, data: Dict[str, Any]) -> str:
                 {"validation_errors": [str(err) for err in e.errors()]}
             )
         
-        # Validate data keys (column names) for security
-        if not request.data:
-            return create_error_response(
-                "No data provided for insertion",
-                {"example": {"name": "John Doe", "email": "john@example.com"}}
-            )
-        
         # Validate column names in data
-        column_validation = validate_column_filters(request.data)
+        column_validation = validate_column_data(request.data)
         if not column_validation["is_valid"]:
             return create_error_response(
                 "Invalid column names in data",
@@ -515,15 +594,17 @@ async def insert_record(table_name: str, data: Dict[str, Any]) -> str:
             )
         
         # Check for excessively large data values
-        for key, value in request.data.items():
-            if isinstance(value, str) and len(value) > 10000:
-                return create_error_response(
-                    f"Data value too large for column '{key}'",
-                    {"max_length": 10000, "actual_length": len(value)}
-                )
+        oversized = _find_oversized_value(request.data)
+        if oversized is not None:
+            key, length = oversized
+            return create_error_response(
+                f"Data value too large for column '{key}'",
+                {"max_length": _MAX_VALUE_LENGTH, "actual_length": length}
+            )
         
         # Execute insert using SupabaseManager
-        result = supabase_manager.execute_query(
+        result = await _run_blocking(
+            supabase_manager.execute_query,
             table_name=request.table_name,
             operation="insert",
             data=request.data
@@ -657,7 +738,7 @@ async def update_record(table_name: str, filters: Dict[str, Any], updates: Dict[
             )
         
         # Security validation for updates
-        update_validation = validate_column_filters(request.updates)
+        update_validation = validate_column_data(request.updates)
         if not update_validation["is_valid"]:
             return create_error_response(
                 "Invalid update values",
@@ -665,28 +746,30 @@ async def update_record(table_name: str, filters: Dict[str, Any], updates: Dict[
             )
         
         # Check for excessively large update values
-        for key, value in request.updates.items():
-            if isinstance(value, str) and len(value) > 10000:
-                return create_error_response(
-                    f"Update value too large for column '{key}'",
-                    {"max_length": 10000, "actual_length": len(value)}
-                )
+        oversized = _find_oversized_value(request.updates)
+        if oversized is not None:
+            key, length = oversized
+            return create_error_response(
+                f"Update value too large for column '{key}'",
+                {"max_length": _MAX_VALUE_LENGTH, "actual_length": length}
+            )
         
         # Prevent updating primary key columns (common security practice)
-        dangerous_update_columns = ["id", "created_at", "updated_at"]
-        for col in dangerous_update_columns:
-            if col in request.updates:
-                logger.warning(f"Attempt to update protected column: {col}")
-                return create_error_response(
-                    f"Cannot update protected column '{col}'",
-                    {
-                        "protected_columns": dangerous_update_columns,
-                        "suggestion": "Use different column names or exclude protected columns"
-                    }
-                )
+        protected = request.updates.keys() & _PROTECTED_UPDATE_COLUMNS
+        if protected:
+            col = next(c for c in _PROTECTED_UPDATE_COLUMNS if c in protected)
+            logger.warning(f"Attempt to update protected column: {col}")
+            return create_error_response(
+                f"Cannot update protected column '{col}'",
+                {
+                    "protected_columns": list(_PROTECTED_UPDATE_COLUMNS),
+                    "suggestion": "Use different column names or exclude protected columns"
+                }
+            )
         
         # Execute update using SupabaseManager
-        result = supabase_manager.execute_query(
+        result = await _run_blocking(
+            supabase_manager.execute_query,
             table_name=request.table_name,
             operation="update",
             filters=request.filters,
@@ -768,8 +851,8 @@ async def update_record(table_name: str, filters: Dict[str, Any], updates: Dict[
         )
 
 
-async def main():
-    """Main entry point with support for both STDIO and HTTP transport modes."""
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Build the command line parser for the server entry point."""
     parser = argparse.ArgumentParser(
         description="Supabase MCP Server with dual-mode transport support"
     )
@@ -795,10 +878,14 @@ async def main():
         default=None,
         help="Comma-separated list of allowed CORS origins for HTTP mode"
     )
+    return parser
+
+
+async def main():
+    """Main entry point with support for both STDIO and HTTP transport modes."""
+    args = build_arg_parser().parse_args()
     
-    args = parser.parse_args()
-    
-    logger.info(f"Starting {config['server_name']} MCP server in {args.mode.upper()} mode...")
+    logger.info(f"Starting {config.server_name} MCP server in {args.mode.upper()} mode...")
     
     if args.mode == "stdio":
         # STDIO mode - preserve existing behavior
@@ -835,12 +922,26 @@ async def main():
     logger.info("MCP server shutdown complete")
 
 
+def _http_loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Return uvloop's loop factory when available, else None (asyncio default).
+    
+    uvloop ships with uvicorn[standard] on platforms that support it. Since
+    the HTTP server is served from inside the loop created by asyncio.run(),
+    the loop has to be chosen here rather than through uvicorn's config.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
+
+
 if __name__ == "__main__":
     # Run appropriate transport mode
     if len(sys.argv) > 1 and any("--mode=http" in arg or arg == "http" for arg in sys.argv):
         # HTTP mode requires async event loop
         try:
-            asyncio.run(main())
+            asyncio.run(main(), loop_factory=_http_loop_factory())
         except KeyboardInterrupt:
             logger.info("Server interrupted by user")
         except Exception as e:
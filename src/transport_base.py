@@ -23,6 +23,20 @@ class TransportBase(ABC):
     maintaining proper error handling and lifecycle management.
     """
     
+    # Base state lives in slots; subclasses without __slots__ keep a __dict__
+    # for their own attributes
+    __slots__ = (
+        'mcp_server', '_running', '_shutdown_future', '_shutdown_requested',
+        '_available_tools', '_tool_cache',
+    )
+    
+    # Class name used in lifecycle log messages, set once per subclass
+    _cls_name = 'TransportBase'
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._cls_name = cls.__name__
+    
     def __init__(self, mcp_server: Any):
         """Initialize transport with MCP server instance.
         
@@ -31,8 +45,16 @@ class TransportBase(ABC):
         """
         self.mcp_server = mcp_server
         self._running = False
-        self._shutdown_event = asyncio.Event()
-        logger.info(f"Initialized {self.__class__.__name__}")
+        # Single-waiter shutdown signal, created on the running loop in run();
+        # the flag records a shutdown requested before the future exists
+        self._shutdown_future: Optional[asyncio.Future] = None
+        self._shutdown_requested = False
+        # Tool registry discovered from the server (see get_available_tools)
+        self._available_tools: Optional[Dict[str, Callable]] = None
+        # Resolved tool callables by method name; tools are registered once at
+        # startup, so a hit skips the registry lookup on every invocation
+        self._tool_cache: Dict[str, Callable] = {}
+        logger.info("Initialized %s", self._cls_name)
     
     @abstractmethod
     async def start(self) -> None:
@@ -62,29 +84,32 @@ class TransportBase(ABC):
         implementations, including startup, shutdown handling, and error recovery.
         """
         try:
-            logger.info(f"Starting {self.__class__.__name__}")
+            logger.info("Starting %s", self._cls_name)
             self._running = True
+            self._shutdown_future = asyncio.get_running_loop().create_future()
+            if self._shutdown_requested:
+                self._shutdown_future.set_result(None)
             await self.start()
             
             # Wait for shutdown signal
-            await self._shutdown_event.wait()
+            await self._shutdown_future
             
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt, shutting down...")
         except Exception as e:
-            logger.error(f"Transport error: {e}")
-            raise RuntimeError(f"Transport failed: {str(e)}") from e
+            logger.error("Transport error: %s", e)
+            raise RuntimeError(f"Transport failed: {e}") from e
         finally:
             await self._graceful_shutdown()
     
     async def _graceful_shutdown(self) -> None:
         """Perform graceful shutdown with proper resource cleanup."""
         if self._running:
-            logger.info(f"Shutting down {self.__class__.__name__}")
+            logger.info("Shutting down %s", self._cls_name)
             try:
                 await self.stop()
             except Exception as e:
-                logger.error(f"Error during transport shutdown: {e}")
+                logger.error("Error during transport shutdown: %s", e)
             finally:
                 self._running = False
                 logger.info("Transport shutdown completed")
@@ -96,7 +121,10 @@ class TransportBase(ABC):
         to initiate a graceful shutdown.
         """
         logger.info("Shutdown requested")
-        self._shutdown_event.set()
+        self._shutdown_requested = True
+        future = self._shutdown_future
+        if future is not None and not future.done():
+            future.set_result(None)
     
     @property
     def is_running(self) -> bool:
@@ -106,6 +134,28 @@ class TransportBase(ABC):
     def get_available_tools(self) -> Dict[str, Callable]:
         """Get available MCP tools from the server.
         
+        The registry is discovered once and reused until refresh_tools() is
+        called. An empty result is not cached, so tools registered after the
+        first lookup are still picked up.
+        
+        Returns:
+            Dict mapping tool names to their implementation functions
+        """
+        tools = self._available_tools
+        if tools is None:
+            tools = self._discover_tools()
+            if tools:
+                self._available_tools = tools
+        return tools
+    
+    def refresh_tools(self) -> None:
+        """Discard cached tool lookups so the server registry is read again."""
+        self._available_tools = None
+        self._tool_cache.clear()
+    
+    def _discover_tools(self) -> Dict[str, Callable]:
+        """Collect the tools registered on the MCP server.
+        
         Returns:
             Dict mapping tool names to their implementation functions
         """
@@ -113,23 +163,44 @@ class TransportBase(ABC):
         if hasattr(self.mcp_server, '_tools'):
             return self.mcp_server._tools
         
-        # Fallback: try to extract tools from server
+        # Fallback: scan the raw class and instance namespaces for tool-marked
+        # callables. Reading __dict__ entries does not run descriptors, so
+        # properties with lazy initialization (e.g. session_manager) are never
+        # evaluated; only the matched tools are bound via getattr.
+        server = self.mcp_server
+        namespace: Dict[str, Any] = {}
+        for klass in reversed(type(server).__mro__):
+            namespace.update(vars(klass))
+        namespace.update(getattr(server, '__dict__', {}))
+        
         tools = {}
-        for attr_name in dir(self.mcp_server):
-            # Skip attributes that might trigger lazy initialization
-            if attr_name in ['session_manager']:
-                continue
-            
-            try:
-                attr = getattr(self.mcp_server, attr_name)
-                if callable(attr) and hasattr(attr, '_mcp_tool'):
-                    tools[attr_name] = attr
-            except RuntimeError:
-                # Skip attributes that can't be accessed yet
-                continue
+        for attr_name, attr in namespace.items():
+            if attr_name != 'session_manager' and callable(attr) and hasattr(attr, '_mcp_tool'):
+                tools[attr_name] = getattr(server, attr_name)
         
         return tools
     
+    def _resolve_tool(self, method: str) -> Callable:
+        """Look up a tool in the server registry and cache it by name.
+        
+        Args:
+            method: Tool method name
+            
+        Returns:
+            Tool implementation function
+            
+        Raises:
+            ValueError: If tool method is not found
+        """
+        tools = self.get_available_tools()
+        
+        if method not in tools:
+            available = list(tools.keys())
+            raise ValueError(f"Tool '{method}' not found. Available tools: {available}")
+        
+        tool = self._tool_cache[method] = tools[method]
+        return tool
+    
     async def invoke_tool(self, method: str, params: Dict[str, Any]) -> Any:
         """Invoke an MCP tool with given parameters.
         
@@ -144,26 +215,32 @@ class TransportBase(ABC):
             ValueError: If tool method is not found
             Exception: If tool execution fails
         """
-        tools = self.get_available_tools()
+        tool = self._tool_cache.get(method)
+        if tool is None:
+            tool = self._resolve_tool(method)
         
-        if method not in tools:
-            available = list(tools.keys())
-            raise ValueError(f"Tool '{method}' not found. Available tools: {available}")
+        # Checked once per call so the two debug calls are skipped entirely
+        # when debug logging is disabled
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         try:
-            logger.debug(f"Invoking tool: {method} with params: {params}")
-            result = await tools[method](**params)
-            logger.debug(f"Tool {method} completed successfully")
+            if debug:
+                logger.debug("Invoking tool: %s with params: %s", method, params)
+            result = await tool(**params)
+            if debug:
+                logger.debug("Tool %s completed successfully", method)
             return result
             
         except Exception as e:
-            logger.error(f"Tool {method} failed: {e}")
+            logger.error("Tool %s failed: %s", method, e)
             raise
 
 
 class TransportError(Exception):
     """Base exception for transport-related errors."""
     
+    __slots__ = ('transport_type', 'details')
+    
     def __init__(self, message: str, transport_type: str, details: Optional[Dict[str, Any]] = None):
         """Initialize transport error.
         
@@ -175,4 +252,4 @@ class TransportError(Exception):
         super().__init__(message)
         self.transport_type = transport_type
         self.details = details or {}
-        logger.error(f"Transport error in {transport_type}: {message}")
\ No newline at end of file
+        logger.error("Transport error in %s: %s", transport_type, message)
\ No newline at end of file
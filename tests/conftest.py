@@ -0,0 +1,56 @@
+"""Shared pytest fixtures."""
+
+import os
+import tempfile
+
+import pytest
+
+try:
+    import uvloop
+except ImportError:  # Windows, PyPy: tests run on the default asyncio loop
+    uvloop = None
+
+# src.mcp_server validates its environment at import time, before any fixture
+# runs; placeholders let test modules import it without real credentials
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+
+from tests.test_client import MCPStdioClient, start_server
+
+
+@pytest.fixture(scope="session")
+def mcp_process():
+    """Start one STDIO MCP server for the whole session and initialize it.
+    
+    Tests that need a live server share this process instead of paying the
+    interpreter and server startup cost each time. Server logs go to a
+    temporary file, which nothing has to drain while the session runs.
+    Raises RuntimeError with the last log line when the server does not
+    start or does not answer the handshake in time.
+    """
+    with tempfile.TemporaryFile() as stderr_file:
+        process = start_server(stderr=stderr_file)
+        try:
+            MCPStdioClient(process).initialize()
+        except (RuntimeError, OSError) as e:
+            process.kill()
+            process.wait()
+            stderr_file.seek(0)
+            stderr_lines = stderr_file.read().decode(errors="replace").strip().splitlines()
+            reason = stderr_lines[-1] if stderr_lines else e
+            raise RuntimeError(f"MCP server unavailable: {reason}") from e
+        
+        yield process
+        
+        process.terminate()
+        process.wait()
+
+
+if uvloop is not None:
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop, which ships with uvicorn[standard].
+        
+        Its lower per-task overhead adds up over the many short tool tests,
+        and the HTTP server runs on uvloop in production as well.
+        """
+        return {"uvloop": uvloop.new_event_loop}
@@ -4,6 +4,7 @@ This module tests all database-related functionality including validation functi
 Pydantic models, and the SupabaseManager class with various scenarios.
 """
 
+import httpx
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from pydantic import ValidationError
@@ -15,94 +16,154 @@ from src.database import (
     RecordUpdateRequest,
     validate_table_name,
     validate_column_filters,
+    validate_column_data,
+    _check_column_items_cached,
+    _check_table_name_cached,
+    create_client,
+    _cached_client,
 )
 
 
+class _FakeQuery:
+    """Minimal stand-in for a PostgREST query builder that records its calls.
+    
+    Plain attribute access keeps manager tests cheap compared to deep Mock
+    chains, and the recorded calls make the built query easy to assert on.
+    """
+    
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+    
+    def _record(self, name, *args):
+        self.calls.append((name, *args))
+        if self.error is not None:
+            raise self.error
+        return self
+    
+    def select(self, columns):
+        return self._record("select", columns)
+    
+    def match(self, filters):
+        return self._record("match", filters)
+    
+    def limit(self, count):
+        return self._record("limit", count)
+    
+    def order(self, column):
+        return self._record("order", column)
+    
+    def insert(self, data):
+        return self._record("insert", data)
+    
+    def update(self, updates):
+        return self._record("update", updates)
+    
+    def delete(self):
+        return self._record("delete")
+    
+    def execute(self):
+        self.calls.append(("execute",))
+        return self.result
+
+
+class _FakeClient:
+    """Supabase client fake whose tables all share one recording query."""
+    
+    def __init__(self, result=None, error=None):
+        self.query = _FakeQuery(result, error)
+    
+    def table(self, name):
+        self.query.calls.append(("table", name))
+        return self.query
+    
+    from_ = table
+
+
 class TestValidationFunctions:
     """Test validation functions for security and input validation."""
 
-    def test_validate_table_name_valid_names(self):
+    @pytest.mark.parametrize("name", [
+        "users", "user_profiles", "orders123", "_private_table", "a_very_long_table_name",
+    ])
+    def test_validate_table_name_valid_names(self, name):
         """Test table name validation with valid names."""
-        valid_names = ["users", "user_profiles", "orders123", "_private_table", "a_very_long_table_name"]
-        
-        for name in valid_names:
-            result = validate_table_name(name)
-            assert result["is_valid"] is True
+        result = validate_table_name(name)
+        assert result["is_valid"] is True
 
-    def test_validate_table_name_invalid_format(self):
+    @pytest.mark.parametrize("name", [
+        "123users",       # starts with number
+        "user-profiles",  # contains hyphen
+        "user profiles",  # contains space
+        "user@table",     # contains special character
+        "user.table",     # contains dot
+        "usér",           # non-ASCII letter
+        "",               # empty string
+        "   ",            # whitespace only
+    ])
+    def test_validate_table_name_invalid_format(self, name):
         """Test table name validation with invalid formats."""
-        invalid_names = [
-            "123users",       # starts with number
-            "user-profiles",  # contains hyphen
-            "user profiles",  # contains space
-            "user@table",     # contains special character
-            "user.table",     # contains dot
-            "",               # empty string
-            "   ",            # whitespace only
-        ]
-        
-        for name in invalid_names:
-            result = validate_table_name(name)
-            assert result["is_valid"] is False
-            assert "error" in result
-
-    def test_validate_table_name_system_tables(self):
+        result = validate_table_name(name)
+        assert result["is_valid"] is False
+        assert "error" in result
+
+    @pytest.mark.parametrize("name", [
+        "pg_user",                # starts with "pg_"
+        "information_schema",     # exact match
+        "supabase_auth_users",    # starts with "supabase_"
+    ])
+    def test_validate_table_name_system_tables(self, name):
         """Test table name validation blocks system tables."""
-        system_names = [
-            "pg_user",                # starts with "pg_"
-            "information_schema",     # exact match
-            "supabase_auth_users",   # starts with "supabase_"  
-        ]
-        
-        for name in system_names:
-            result = validate_table_name(name)
-            assert result["is_valid"] is False
-            assert ("system" in result["error"].lower() or 
-                    "access" in result["error"].lower() or
-                    "not allowed" in result["error"].lower())
-
-    def test_validate_column_filters_valid_filters(self):
+        result = validate_table_name(name)
+        assert result["is_valid"] is False
+        assert ("system" in result["error"].lower() or 
+                "access" in result["error"].lower() or
+                "not allowed" in result["error"].lower())
+
+    @pytest.mark.parametrize("filters", [
+        {},  # empty filters
+        {"name": "John", "age": 25, "active": True},
+        {"id": 123, "status": "active"},
+        {"created_at": "2024-01-01"},
+    ])
+    def test_validate_column_filters_valid_filters(self, filters):
         """Test column filter validation with valid filters."""
-        valid_filters = [
-            {},  # empty filters
-            {"name": "John", "age": 25, "active": True},
-            {"id": 123, "status": "active"},
-            {"created_at": "2024-01-01"},
-        ]
-        
-        for filters in valid_filters:
-            result = validate_column_filters(filters)
-            assert result["is_valid"] is True
+        result = validate_column_filters(filters)
+        assert result["is_valid"] is True
 
-    def test_validate_column_filters_sql_injection(self):
+    @pytest.mark.parametrize("filters", [
+        {"name": "'; DROP TABLE users; --"},
+        {"id": "1 OR 1=1"},
+        {"status": "/* comment */ active"},
+        {"query": "UNION SELECT * FROM users"},
+        {"exec": "xp_cmdshell 'ls'"},
+        {"name": "admin' --"},
+    ])
+    def test_validate_column_filters_sql_injection(self, filters):
         """Test column filter validation blocks SQL injection attempts."""
-        dangerous_filters = [
-            {"name": "'; DROP TABLE users; --"},
-            {"id": "1 OR 1=1"},
-            {"status": "/* comment */ active"},
-            {"query": "UNION SELECT * FROM users"},
-            {"exec": "xp_cmdshell 'ls'"},
-            {"name": "admin' --"},
-        ]
-        
-        for filters in dangerous_filters:
-            result = validate_column_filters(filters)
-            assert result["is_valid"] is False
-            assert "dangerous pattern" in result["error"].lower() or "invalid" in result["error"].lower()
-
-    def test_validate_column_filters_invalid_column_names(self):
+        result = validate_column_filters(filters)
+        assert result["is_valid"] is False
+        assert "dangerous pattern" in result["error"].lower() or "invalid" in result["error"].lower()
+
+    @pytest.mark.parametrize("filters", [
+        {"123column": "value"},      # starts with number
+        {"user-name": "John"},       # contains hyphen
+        {"user name": "John"},       # contains space
+        {"user@domain": "value"},    # contains special character
+    ])
+    def test_validate_column_filters_invalid_column_names(self, filters):
         """Test column filter validation with invalid column names."""
-        invalid_filters = [
-            {"123column": "value"},      # starts with number
-            {"user-name": "John"},       # contains hyphen
-            {"user name": "John"},       # contains space
-            {"user@domain": "value"},    # contains special character
-        ]
-        
-        for filters in invalid_filters:
-            result = validate_column_filters(filters)
-            assert result["is_valid"] is False
-            assert "column name" in result["error"].lower()
+        result = validate_column_filters(filters)
+        assert result["is_valid"] is False
+        assert "column name" in result["error"].lower()
+
+    def test_validate_column_filters_reports_field(self):
+        """Test failed validation reports the offending column separately."""
+        result = validate_column_filters({"status": "active", "name": "admin' --"})
+        assert result["is_valid"] is False
+        assert result["field"] == "name"
+        assert result["error"] == "Potentially dangerous pattern detected in filter: name"
 
     def test_validate_column_filters_large_values(self):
         """Test column filter validation with excessively large values."""
@@ -157,6 +218,40 @@ class TestPydanticModels:
         with pytest.raises(ValidationError):
             TableQueryRequest(table_name="users", limit=-5)  # negative
 
+    def test_table_query_request_cached(self):
+        """Test cached construction reuses instances for identical inputs."""
+        first = TableQueryRequest.cached("users", 10, {"status": "active"})
+        second = TableQueryRequest.cached("users", 10, {"status": "active"})
+        assert first is second
+
+        # Equal-but-differently-typed values must not share a cache entry
+        as_int = TableQueryRequest.cached("users", filters={"active": 1})
+        as_bool = TableQueryRequest.cached("users", filters={"active": True})
+        assert as_int is not as_bool
+        assert as_bool.filters["active"] is True
+
+        # Unhashable filter values fall back to normal construction
+        request = TableQueryRequest.cached("users", filters={"tags": ["a", "b"]})
+        assert request.filters == {"tags": ["a", "b"]}
+
+        with pytest.raises(ValidationError):
+            TableQueryRequest.cached("123invalid")
+
+    def test_table_query_request_cached_skips_large_filters(self):
+        """Test oversized filter maps and values are never cached."""
+        TableQueryRequest._cached_instance.cache_clear()
+
+        many = {f"col{i}": "x" * 999 for i in range(500)}
+        request = TableQueryRequest.cached("users", filters=many)
+        assert request.filters == many
+
+        request = TableQueryRequest.cached("users", filters={"name": "a" * 1001})
+        assert request.filters["name"] == "a" * 1001
+        assert TableQueryRequest._cached_instance.cache_info().currsize == 0
+
+        TableQueryRequest.cached("users", filters={"status": "active"})
+        assert TableQueryRequest._cached_instance.cache_info().currsize == 1
+
     def test_record_insert_request_valid(self):
         """Test RecordInsertRequest with valid data."""
         request = RecordInsertRequest(
@@ -197,10 +292,32 @@ class TestPydanticModels:
                 updates={"name": "test"}
             )
 
+    def test_request_models_are_frozen_and_strict(self):
+        """Test request models reject unknown fields and assignment."""
+        request = TableQueryRequest(table_name="users")
+
+        with pytest.raises(ValidationError):
+            request.limit = 10
+
+        with pytest.raises(ValidationError):
+            RecordUpdateRequest(
+                table_name="users",
+                filters={"id": 1},
+                updates={"name": "test"},
+                upsert=True
+            )
+
 
 class TestSupabaseManager:
     """Test SupabaseManager class functionality."""
 
+    @pytest.fixture(autouse=True)
+    def clear_client_cache(self):
+        """Reset the shared client cache so each test sees its own mock."""
+        _cached_client.cache_clear()
+        yield
+        _cached_client.cache_clear()
+
     def test_init_valid_credentials(self):
         """Test SupabaseManager initialization with valid credentials."""
         manager = SupabaseManager(
@@ -225,6 +342,10 @@ class TestSupabaseManager:
         with pytest.raises(ValueError, match="must be a valid HTTPS URL"):
             SupabaseManager("http://test.com", "test-key")
 
+        # Scheme without a host
+        with pytest.raises(ValueError, match="must be a valid HTTPS URL"):
+            SupabaseManager("https://", "test-key")
+
     @patch('src.database.create_client')
     def test_initialize_client_success(self, mock_create_client):
         """Test successful client initialization."""
@@ -265,14 +386,30 @@ class TestSupabaseManager:
         assert client2 == mock_client
         mock_create_client.assert_called_once()  # Only called once
 
+    @patch('src.database.create_client')
+    def test_managers_share_client(self, mock_create_client):
+        """Test managers with the same credentials reuse one client."""
+        mock_create_client.return_value = Mock()
+
+        manager1 = SupabaseManager("https://test.supabase.co", "test-key")
+        manager2 = SupabaseManager("https://test.supabase.co", "test-key")
+
+        assert manager1.get_client() is manager2.get_client()
+        mock_create_client.assert_called_once()
+
+    @patch('supabase.create_client')
+    def test_create_client_uses_pooled_http_client(self, mock_sdk_create_client):
+        """Test the SDK client is built on a keep-alive httpx connection pool."""
+        create_client("https://test.supabase.co", "test-key")
+
+        options = mock_sdk_create_client.call_args.kwargs["options"]
+        assert isinstance(options.httpx_client, httpx.Client)
+        options.httpx_client.close()
+
     @patch('src.database.create_client')
     def test_test_connection_success(self, mock_create_client):
         """Test connection health check success."""
-        mock_client = Mock()
-        mock_result = Mock()
-        mock_result.data = [{"count": 5}]
-        mock_client.from_.return_value.select.return_value.limit.return_value.execute.return_value = mock_result
-        mock_create_client.return_value = mock_client
+        mock_create_client.return_value = _FakeClient(Mock(data=[{"count": 5}]))
 
         manager = SupabaseManager("https://test.supabase.co", "test-key")
         result = manager.test_connection()
@@ -283,9 +420,7 @@ class TestSupabaseManager:
     @patch('src.database.create_client')
     def test_test_connection_failure(self, mock_create_client):
         """Test connection health check failure."""
-        mock_client = Mock()
-        mock_client.from_.side_effect = Exception("Connection timeout")
-        mock_create_client.return_value = mock_client
+        mock_create_client.return_value = _FakeClient(error=Exception("Connection timeout"))
 
         manager = SupabaseManager("https://test.supabase.co", "test-key")
         result = manager.test_connection()
@@ -318,18 +453,8 @@ class TestSupabaseManager:
     @patch('src.database.create_client')
     def test_execute_select_query(self, mock_create_client):
         """Test execute_query with SELECT operation."""
-        mock_client = Mock()
-        mock_table = Mock()
-        mock_query = Mock()
-        mock_result = Mock()
-        mock_result.data = [{"id": 1, "name": "John"}]
-
-        mock_client.table.return_value = mock_table
-        mock_table.select.return_value = mock_query
-        mock_query.eq.return_value = mock_query
-        mock_query.limit.return_value = mock_query
-        mock_query.execute.return_value = mock_result
-        mock_create_client.return_value = mock_client
+        client = _FakeClient(Mock(data=[{"id": 1, "name": "John"}]))
+        mock_create_client.return_value = client
 
         manager = SupabaseManager("https://test.supabase.co", "test-key")
         result = manager.execute_query(
@@ -340,21 +465,19 @@ class TestSupabaseManager:
         )
 
         assert result.data == [{"id": 1, "name": "John"}]
-        mock_table.select.assert_called_once_with("*")
-        mock_query.eq.assert_called_once_with("status", "active")
-        mock_query.limit.assert_called_once_with(10)
+        assert client.query.calls == [
+            ("table", "users"),
+            ("select", "*"),
+            ("match", {"status": "active"}),
+            ("limit", 10),
+            ("execute",),
+        ]
 
     @patch('src.database.create_client')
     def test_execute_insert_query(self, mock_create_client):
         """Test execute_query with INSERT operation."""
-        mock_client = Mock()
-        mock_table = Mock()
-        mock_result = Mock()
-        mock_result.data = [{"id": 1, "name": "John", "email": "john@example.com"}]
-
-        mock_client.table.return_value = mock_table
-        mock_table.insert.return_value.execute.return_value = mock_result
-        mock_create_client.return_value = mock_client
+        client = _FakeClient(Mock(data=[{"id": 1, "name": "John", "email": "john@example.com"}]))
+        mock_create_client.return_value = client
 
         manager = SupabaseManager("https://test.supabase.co", "test-key")
         result = manager.execute_query(
@@ -364,22 +487,17 @@ class TestSupabaseManager:
         )
 
         assert result.data == [{"id": 1, "name": "John", "email": "john@example.com"}]
-        mock_table.insert.assert_called_once_with({"name": "John", "email": "john@example.com"})
+        assert client.query.calls == [
+            ("table", "users"),
+            ("insert", {"name": "John", "email": "john@example.com"}),
+            ("execute",),
+        ]
 
     @patch('src.database.create_client')
     def test_execute_update_query(self, mock_create_client):
         """Test execute_query with UPDATE operation."""
-        mock_client = Mock()
-        mock_table = Mock()
-        mock_query = Mock()
-        mock_result = Mock()
-        mock_result.data = [{"id": 1, "name": "Updated Name"}]
-
-        mock_client.table.return_value = mock_table
-        mock_table.update.return_value = mock_query
-        mock_query.eq.return_value = mock_query
-        mock_query.execute.return_value = mock_result
-        mock_create_client.return_value = mock_client
+        client = _FakeClient(Mock(data=[{"id": 1, "name": "Updated Name"}]))
+        mock_create_client.return_value = client
 
         manager = SupabaseManager("https://test.supabase.co", "test-key")
         result = manager.execute_query(
@@ -390,17 +508,32 @@ class TestSupabaseManager:
         )
 
         assert result.data == [{"id": 1, "name": "Updated Name"}]
-        mock_table.update.assert_called_once_with({"name": "Updated Name"})
-        mock_query.eq.assert_called_once_with("id", 1)
+        assert client.query.calls == [
+            ("table", "users"),
+            ("update", {"name": "Updated Name"}),
+            ("match", {"id": 1}),
+            ("execute",),
+        ]
+
+    @patch('src.database.create_client')
+    def test_execute_update_validates_updates(self, mock_create_client):
+        """Test UPDATE rejects dangerous values in updates as well as filters."""
+        mock_create_client.return_value = Mock()
+
+        manager = SupabaseManager("https://test.supabase.co", "test-key")
+
+        with pytest.raises(ValueError, match="dangerous pattern detected in filter: name"):
+            manager.execute_query(
+                "users",
+                "update",
+                filters={"id": 1},
+                updates={"name": "x'; DROP TABLE users; --"}
+            )
 
     @patch('src.database.create_client')
     def test_execute_query_database_error(self, mock_create_client):
         """Test execute_query handles database errors."""
-        mock_client = Mock()
-        mock_table = Mock()
-        mock_table.select.side_effect = Exception("Database connection lost")
-        mock_client.table.return_value = mock_table
-        mock_create_client.return_value = mock_client
+        mock_create_client.return_value = _FakeClient(error=Exception("Database connection lost"))
 
         manager = SupabaseManager("https://test.supabase.co", "test-key")
 
@@ -417,6 +550,17 @@ class TestEdgeCases:
         result = validate_table_name(long_name)
         assert result["is_valid"] is True
 
+    def test_long_table_names_bypass_the_cache(self):
+        """Test names longer than a Postgres identifier are checked uncached."""
+        _check_table_name_cached.cache_clear()
+
+        assert validate_table_name("a" * 500_000)["is_valid"] is True
+        assert validate_table_name("a-" * 100)["is_valid"] is False
+        assert _check_table_name_cached.cache_info().currsize == 0
+
+        assert validate_table_name("users")["is_valid"] is True
+        assert _check_table_name_cached.cache_info().currsize == 1
+
     def test_unicode_in_filters(self):
         """Test validation with unicode characters in filters."""
         unicode_filters = {
@@ -449,4 +593,42 @@ class TestEdgeCases:
 
         # Test minimum limit
         request = TableQueryRequest(table_name="users", limit=1)
-        assert request.limit == 1
\ No newline at end of file
+        assert request.limit == 1
+
+    def test_unhashable_filter_values(self):
+        """Test validation handles unhashable filter values that bypass the cache."""
+        result = validate_column_filters({"tags": ["python", "mcp"], "meta": {"a": 1}})
+        assert result["is_valid"] is True
+
+    def test_repeated_validation_is_consistent(self):
+        """Test cached validation returns independent, consistent results."""
+        first = validate_table_name("pg_user")
+        first["is_valid"] = True  # Mutating a result must not poison the cache
+        second = validate_table_name("pg_user")
+        assert second["is_valid"] is False
+        assert "pg_" in second["error"]
+
+    def test_large_or_long_filters_bypass_the_cache(self):
+        """Test oversized filter maps and values are validated without caching."""
+        _check_column_items_cached.cache_clear()
+        
+        result = validate_column_filters({"name": "a" * 1001})
+        assert result["is_valid"] is False
+        assert "too long" in result["error"]
+        
+        many = {f"col{i}": i for i in range(20)}
+        assert validate_column_filters(many)["is_valid"] is True
+        assert _check_column_items_cached.cache_info().currsize == 0
+        
+        assert validate_column_filters({"status": "active"})["is_valid"] is True
+        assert _check_column_items_cached.cache_info().currsize == 1
+
+    def test_column_data_is_not_cached(self):
+        """Test insert and update payloads are validated but never cached."""
+        _check_column_items_cached.cache_clear()
+        
+        assert validate_column_data({"name": "John", "email": "john@example.com"})["is_valid"] is True
+        result = validate_column_data({"bad-column": "x"})
+        assert result["is_valid"] is False
+        assert result["field"] == "bad-column"
+        assert _check_column_items_cached.cache_info().currsize == 0
@@ -6,23 +6,59 @@ Server-Sent Events streaming, session management, and security features.
 
 import asyncio
 import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from fastapi.testclient import TestClient
 import httpx
 
 # Import the HTTP transport and related components
-from src.http_transport import HttpTransport, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from src.http_transport import (
+    SESSION_TIMEOUT,
+    HttpTransport,
+    JsonRpcRequest,
+    JsonRpcResponse,
+    JsonRpcError,
+)
 from src.transport_base import TransportError
 
+# Tool result large enough to be streamed; built once for the whole module
+_BIG_RESULT = "**Success**\n\n" + "Large data " * 1000
+
+
+@dataclass
+class FakeMcp:
+    """Minimal FastMCP stand-in exposing only the tool registry.
+    
+    Plain attributes avoid Mock's attribute auto-creation; tools are either
+    the coroutine helpers below or AsyncMocks where a test asserts on calls.
+    """
+    _tools: Dict[str, Any] = field(default_factory=dict)
+
+
+def async_return(value):
+    """Build a tool coroutine function that returns value."""
+    async def tool(**kwargs):
+        return value
+    return tool
+
+
+def async_raise(error):
+    """Build a tool coroutine function that raises error."""
+    async def tool(**kwargs):
+        raise error
+    return tool
+
 
 class TestHttpTransportInitialization:
     """Test HTTP transport initialization and configuration."""
     
     def test_http_transport_init_defaults(self):
         """Test HTTP transport initialization with default values."""
-        mock_mcp_server = Mock()
-        mock_mcp_server._tools = {"list_tables": Mock()}
+        mock_mcp_server = FakeMcp({"list_tables": async_return("Success")})
         
         transport = HttpTransport(mock_mcp_server)
         
@@ -34,7 +70,7 @@ class TestHttpTransportInitialization:
     
     def test_http_transport_init_custom_values(self):
         """Test HTTP transport initialization with custom values."""
-        mock_mcp_server = Mock()
+        mock_mcp_server = FakeMcp()
         cors_origins = ["http://example.com", "https://app.example.com"]
         
         transport = HttpTransport(
@@ -50,8 +86,7 @@ class TestHttpTransportInitialization:
     
     def test_fastapi_app_configuration(self):
         """Test FastAPI app is properly configured."""
-        mock_mcp_server = Mock()
-        transport = HttpTransport(mock_mcp_server)
+        transport = HttpTransport(FakeMcp())
         
         assert transport.app.title == "Supabase MCP Server"
         assert transport.app.docs_url is None  # Security - docs disabled
@@ -124,28 +159,43 @@ class TestJsonRpcModels:
 
 
 class TestMcpEndpoint:
-    """Test the main /mcp endpoint functionality."""
+    """Test the main /mcp endpoint functionality.
     
-    @pytest.fixture
-    def mock_mcp_server(self):
+    The transport and client are shared by the whole class so the FastAPI app
+    is built once; reset_state restores per-test isolation.
+    """
+    
+    @pytest.fixture(scope="class")
+    @classmethod
+    def mock_mcp_server(cls):
         """Create mock MCP server with tools."""
-        server = Mock()
-        server._tools = {
+        return FakeMcp({
             "list_tables": AsyncMock(return_value="**Success**\n\nTables: users, orders"),
             "query_table": AsyncMock(return_value="**Success**\n\nData: [...]")
-        }
-        return server
+        })
     
-    @pytest.fixture
-    def transport(self, mock_mcp_server):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def transport(cls, mock_mcp_server):
         """Create HTTP transport instance."""
         return HttpTransport(mock_mcp_server)
     
-    @pytest.fixture
-    def client(self, transport):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def client(cls, transport):
         """Create FastAPI test client."""
         return TestClient(transport.app)
     
+    @pytest.fixture(autouse=True)
+    def reset_state(self, transport, mock_mcp_server):
+        """Reset tool mocks, sessions and tool caches after each test."""
+        yield
+        for tool in mock_mcp_server._tools.values():
+            tool.reset_mock(side_effect=True)
+        transport._sessions.clear()
+        transport._session_expiry.clear()
+        transport.refresh_tools()
+    
     def test_mcp_endpoint_get_info(self, client):
         """Test GET /mcp returns server information."""
         response = client.get("/mcp")
@@ -169,8 +219,10 @@ class TestMcpEndpoint:
         
         response = client.post("/mcp", json=request_data)
         
+        # list_tables results are always streamed as a single SSE event
         assert response.status_code == 200
-        data = response.json()
+        assert response.headers["content-type"].startswith("text/event-stream")
+        data = json.loads(response.text[len("data: "):])
         assert data["jsonrpc"] == "2.0"
         assert data["id"] == 1
         assert "result" in data
@@ -197,6 +249,51 @@ class TestMcpEndpoint:
         assert "error" in data
         assert data["error"]["code"] == -32601  # Method not found
     
+    async def test_invoke_tool_caches_resolved_tool(self, transport, mock_mcp_server):
+        """Test tools are looked up in the registry only once per method."""
+        with patch.object(
+            transport, "get_available_tools", wraps=transport.get_available_tools
+        ) as lookup:
+            await transport.invoke_tool("query_table", {})
+            await transport.invoke_tool("query_table", {})
+        
+        assert lookup.call_count == 1
+        assert mock_mcp_server._tools["query_table"].await_count == 2
+    
+    def test_available_tools_cached_until_refresh(self, transport, mock_mcp_server):
+        """Test the tool registry is discovered once until refresh_tools()."""
+        with patch.object(
+            transport, "_discover_tools", return_value=mock_mcp_server._tools
+        ) as discover:
+            transport.get_available_tools()
+            transport.get_available_tools()
+            assert discover.call_count == 1
+            
+            transport.refresh_tools()
+            transport.get_available_tools()
+            assert discover.call_count == 2
+    
+    def test_tool_discovery_fallback_skips_lazy_attributes(self):
+        """Test fallback discovery finds marked tools without evaluating properties."""
+        class Server:
+            async def ping(self):
+                return "pong"
+            ping._mcp_tool = True
+            
+            @property
+            def session_manager(self):
+                raise RuntimeError("session manager not started")
+            
+            @property
+            def settings(self):
+                raise RuntimeError("lazy attribute evaluated")
+        
+        server = Server()
+        tools = HttpTransport(server).get_available_tools()
+        
+        assert list(tools) == ["ping"]
+        assert tools["ping"].__self__ is server
+    
     def test_mcp_endpoint_tool_execution_error(self, client, mock_mcp_server):
         """Test tool execution error handling."""
         # Mock tool to raise exception
@@ -248,6 +345,146 @@ class TestMcpEndpoint:
         assert "error" in data
         assert data["error"]["code"] == -32600  # Invalid Request
 
+    
+    @pytest.mark.parametrize("body", ["not an object", 42, []])
+    def test_mcp_endpoint_non_object_body(self, client, body):
+        """Test valid JSON that is neither an object nor a batch is rejected."""
+        response = client.post("/mcp", json=body)
+        
+        assert response.status_code == 400
+        data = response.json()
+        assert data["error"]["code"] == -32600  # Invalid Request
+    
+    def test_mcp_endpoint_batch(self, client, mock_mcp_server):
+        """Test a batch returns one response per request, in request order."""
+        response = client.post("/mcp", json=[
+            {"jsonrpc": "2.0", "method": "query_table", "params": {}, "id": 1},
+            {"jsonrpc": "2.0", "method": "list_tables", "id": 2},
+        ])
+        
+        assert response.status_code == 200
+        assert "Mcp-Session-Id" in response.headers
+        data = response.json()
+        assert [item["id"] for item in data] == [1, 2]
+        assert data[0]["result"] == "**Success**\n\nData: [...]"
+        assert data[1]["result"] == "**Success**\n\nTables: users, orders"
+        mock_mcp_server._tools["query_table"].assert_awaited_once_with()
+        mock_mcp_server._tools["list_tables"].assert_awaited_once_with()
+    
+    def test_mcp_endpoint_batch_isolates_errors(self, client, transport):
+        """Test invalid or failing batch entries do not affect the others."""
+        response = client.post("/mcp", json=[
+            1,
+            {"jsonrpc": "2.0", "method": "nonexistent_tool", "id": "a"},
+            {"jsonrpc": "2.0", "method": "list_tables", "id": 3},
+        ])
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]["id"] is None
+        assert data[0]["error"]["code"] == -32600  # Invalid Request
+        assert data[1]["id"] == "a"
+        assert data[1]["error"]["code"] == -32601  # Method not found
+        assert data[2]["id"] == 3
+        assert "result" in data[2]
+        
+        # Without a successful call no session is allocated
+        response = client.post("/mcp", json=[{"jsonrpc": "2.0", "method": "nonexistent_tool", "id": 1}])
+        assert "Mcp-Session-Id" not in response.headers
+        assert len(transport._sessions) == 1
+    
+    def test_mcp_endpoint_batch_skips_notifications(self, client, mock_mcp_server):
+        """Test notifications in a batch are run but never answered."""
+        response = client.post("/mcp", json=[
+            {"jsonrpc": "2.0", "method": "query_table"},
+            {"jsonrpc": "2.0", "method": "nonexistent_tool"},
+            {"jsonrpc": "2.0", "method": "list_tables", "id": 2},
+        ])
+        
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()] == [2]
+        mock_mcp_server._tools["query_table"].assert_awaited_once_with()
+        
+        # A batch of only notifications is acknowledged without a body
+        response = client.post("/mcp", json=[{"jsonrpc": "2.0", "method": "list_tables"}])
+        assert response.status_code == 202
+        assert response.content == b""
+    
+    def test_mcp_endpoint_batch_too_large(self, client, transport, mock_mcp_server):
+        """Test batches over the size limit are rejected before any call."""
+        message = {"jsonrpc": "2.0", "method": "list_tables", "id": 1}
+        response = client.post("/mcp", json=[message] * (transport.max_batch_size + 1))
+        
+        assert response.status_code == 400
+        data = response.json()
+        assert data["error"]["code"] == -32600  # Invalid Request
+        mock_mcp_server._tools["list_tables"].assert_not_awaited()
+    
+    def test_mcp_endpoint_batch_runs_concurrently(self):
+        """Test batch entries are dispatched concurrently, not one by one."""
+        started = asyncio.Event()
+        
+        async def wait_for_other(**kwargs):
+            await asyncio.wait_for(started.wait(), timeout=1)
+            return "waited"
+        
+        async def signal_other(**kwargs):
+            started.set()
+            return "signalled"
+        
+        transport = HttpTransport(FakeMcp({"first": wait_for_other, "second": signal_other}))
+        response = TestClient(transport.app).post("/mcp", json=[
+            {"jsonrpc": "2.0", "method": "first", "id": 1},
+            {"jsonrpc": "2.0", "method": "second", "id": 2},
+        ])
+        
+        assert [item["result"] for item in response.json()] == ["waited", "signalled"]
+    
+    def test_mcp_endpoint_params_not_object(self, client):
+        """Test non-object params are rejected as an invalid request."""
+        response = client.post("/mcp", json={
+            "jsonrpc": "2.0",
+            "method": "list_tables",
+            "params": [1, 2],
+            "id": 1
+        })
+        
+        assert response.status_code == 400
+        data = response.json()
+        assert data["error"]["code"] == -32600  # Invalid Request
+        assert "params" in data["error"]["data"]
+    
+    def test_mcp_endpoint_invalid_id_type(self, client):
+        """Test request ids other than string, number or null are rejected."""
+        for bad_id in ({"nested": 1}, [1], True):
+            response = client.post("/mcp", json={
+                "jsonrpc": "2.0",
+                "method": "list_tables",
+                "id": bad_id
+            })
+            
+            assert response.status_code == 400
+            assert response.json()["error"]["code"] == -32600  # Invalid Request
+    
+    def test_mcp_endpoint_body_too_large(self, mock_mcp_server):
+        """Test oversized bodies are rejected, with or without Content-Length."""
+        transport = HttpTransport(mock_mcp_server, max_body_size=64)
+        client = TestClient(transport.app)
+        body = json.dumps({
+            "jsonrpc": "2.0",
+            "method": "list_tables",
+            "params": {"padding": "x" * 100},
+            "id": 1
+        }).encode()
+        
+        response = client.post("/mcp", content=body)
+        assert response.status_code == 413
+        
+        # Chunked upload without a declared length
+        response = client.post("/mcp", content=iter([body[:50], body[50:]]))
+        assert response.status_code == 413
+        
+        mock_mcp_server._tools["list_tables"].assert_not_called()
 
 class TestSessionManagement:
     """Test session management functionality."""
@@ -255,9 +492,7 @@ class TestSessionManagement:
     @pytest.fixture
     def mock_mcp_server(self):
         """Create mock MCP server."""
-        server = Mock()
-        server._tools = {"list_tables": AsyncMock(return_value="Success")}
-        return server
+        return FakeMcp({"list_tables": async_return("Success")})
     
     @pytest.fixture
     def transport(self, mock_mcp_server):
@@ -304,6 +539,18 @@ class TestSessionManagement:
         assert response2.status_code == 200
         assert response2.headers.get("Mcp-Session-Id") == session_id
     
+    def test_failed_call_does_not_create_session(self, client, transport):
+        """Test requests that fail do not allocate a session."""
+        response = client.post("/mcp", json={
+            "jsonrpc": "2.0",
+            "method": "nonexistent_tool",
+            "id": 1
+        })
+        
+        assert response.status_code == 404
+        assert "Mcp-Session-Id" not in response.headers
+        assert transport._sessions == {}
+    
     def test_invalid_session_handling(self, client):
         """Test handling of invalid session ID."""
         request_data = {
@@ -327,11 +574,8 @@ class TestServerSentEvents:
     @pytest.fixture
     def mock_mcp_server(self):
         """Create mock MCP server with streaming tool."""
-        server = Mock()
         # Return large result that should trigger streaming
-        large_result = "**Success**\n\n" + "Large data result. " * 500  # > 5000 chars
-        server._tools = {"query_table": AsyncMock(return_value=large_result)}
-        return server
+        return FakeMcp({"query_table": async_return(_BIG_RESULT)})
     
     @pytest.fixture
     def transport(self, mock_mcp_server):
@@ -355,7 +599,6 @@ class TestServerSentEvents:
         assert transport._should_stream("list_tables", result) is True
         assert transport._should_stream("describe_table", result) is True
     
-    @pytest.mark.asyncio
     async def test_sse_response_format(self, transport):
         """Test SSE response format."""
         result = "Test result"
@@ -366,6 +609,26 @@ class TestServerSentEvents:
         assert sse_response.media_type == "text/event-stream"
         assert sse_response.headers["Cache-Control"] == "no-cache"
         assert sse_response.headers["Connection"] == "keep-alive"
+        assert sse_response.headers["X-Accel-Buffering"] == "no"
+    
+    def test_sse_large_result_is_single_event(self, transport):
+        """Test a large streamed result arrives as one complete JSON-RPC event."""
+        client = TestClient(transport.app)
+        
+        # Small chunks so the frame is split across several writes
+        with patch("src.http_transport.SSE_CHUNK_SIZE", 1024):
+            response = client.post("/mcp", json={
+                "jsonrpc": "2.0",
+                "method": "query_table",
+                "id": 7
+            })
+        
+        assert response.status_code == 200
+        assert response.text.startswith("data: ")
+        assert response.text.endswith("\n\n")
+        data = json.loads(response.text[len("data: "):])
+        assert data["id"] == 7
+        assert data["result"] == _BIG_RESULT
     
     def test_streaming_endpoint_with_large_result(self, mock_mcp_server):
         """Test endpoint returns SSE for large results."""
@@ -373,8 +636,7 @@ class TestServerSentEvents:
         # For now, we verify the _should_stream logic works correctly
         transport = HttpTransport(mock_mcp_server)
         
-        large_result = "**Success**\n\n" + "Large data " * 1000
-        should_stream = transport._should_stream("query_table", large_result)
+        should_stream = transport._should_stream("query_table", _BIG_RESULT)
         assert should_stream is True
 
 
@@ -384,10 +646,8 @@ class TestSecurityFeatures:
     @pytest.fixture
     def transport(self):
         """Create HTTP transport with specific CORS origins."""
-        mock_mcp_server = Mock()
-        mock_mcp_server._tools = {"list_tables": AsyncMock(return_value="Success")}
         return HttpTransport(
-            mock_mcp_server,
+            FakeMcp({"list_tables": async_return("Success")}),
             cors_origins=["https://example.com", "https://app.example.com"]
         )
     
@@ -405,6 +665,8 @@ class TestSecurityFeatures:
         """Test invalid origins are rejected."""
         assert transport._is_valid_origin("https://malicious.com") is False
         assert transport._is_valid_origin("http://evil.example.com") is False
+        assert transport._is_valid_origin("http://localhost.evil.com") is False
+        assert transport._is_valid_origin("http://127.0.0.1.evil.com:8080") is False
     
     def test_no_origin_header(self, transport):
         """Test missing origin header is acceptable."""
@@ -420,11 +682,11 @@ class TestSecurityFeatures:
 class TestHealthEndpoint:
     """Test health check endpoint."""
     
-    @pytest.fixture
-    def client(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def client(cls):
         """Create test client."""
-        mock_mcp_server = Mock()
-        transport = HttpTransport(mock_mcp_server)
+        transport = HttpTransport(FakeMcp())
         return TestClient(transport.app)
     
     def test_health_endpoint(self, client):
@@ -443,9 +705,7 @@ class TestTransportLifecycle:
     @pytest.fixture
     def mock_mcp_server(self):
         """Create mock MCP server."""
-        server = Mock()
-        server._tools = {}
-        return server
+        return FakeMcp()
     
     def test_transport_initialization(self, mock_mcp_server):
         """Test transport initializes correctly."""
@@ -454,23 +714,86 @@ class TestTransportLifecycle:
         assert transport.is_running is False
         assert len(transport._sessions) == 0
     
-    @pytest.mark.asyncio
     async def test_session_cleanup(self, mock_mcp_server):
         """Test session cleanup functionality."""
         transport = HttpTransport(mock_mcp_server)
         
         # Add a session
-        transport._sessions["test-session"] = {
-            "created_at": 0,  # Very old timestamp
-            "last_seen": 0,
-            "requests": 1
-        }
+        session_id = transport._handle_session(Mock(headers={}))
+        assert session_id in transport._sessions
         
-        # Run cleanup
-        transport._cleanup_sessions()
+        # Run cleanup once the session has been idle past the timeout
+        with patch("src.http_transport.time.monotonic", return_value=time.monotonic() + SESSION_TIMEOUT + 1):
+            await transport._cleanup_sessions()
         
         # Session should be cleaned up
-        assert "test-session" not in transport._sessions
+        assert session_id not in transport._sessions
+        assert transport._session_expiry == []
+    
+    async def test_session_cleanup_keeps_active_sessions(self, mock_mcp_server):
+        """Test sessions used since they were scheduled survive cleanup."""
+        transport = HttpTransport(mock_mcp_server)
+        start = time.monotonic()
+        
+        session_id = transport._handle_session(Mock(headers={}))
+        
+        # Session is used again shortly before the original deadline
+        with patch("src.http_transport.time.monotonic", return_value=start + SESSION_TIMEOUT - 10):
+            transport._handle_session(Mock(headers={"mcp-session-id": session_id}))
+        
+        with patch("src.http_transport.time.monotonic", return_value=start + SESSION_TIMEOUT + 1):
+            await transport._cleanup_sessions()
+        
+        assert session_id in transport._sessions
+        assert len(transport._session_expiry) == 1
+    
+    def test_session_limit_evicts_least_recently_used(self, mock_mcp_server):
+        """Test new sessions beyond the limit evict the least recently used."""
+        transport = HttpTransport(mock_mcp_server, max_sessions=2)
+        
+        with patch("src.http_transport.time.monotonic", return_value=100.0):
+            first = transport._handle_session(Mock(headers={}))
+        with patch("src.http_transport.time.monotonic", return_value=200.0):
+            second = transport._handle_session(Mock(headers={}))
+        with patch("src.http_transport.time.monotonic", return_value=300.0):
+            transport._handle_session(Mock(headers={"mcp-session-id": first}))
+            third = transport._handle_session(Mock(headers={}))
+        
+        assert set(transport._sessions) == {first, third}
+        assert second not in transport._sessions
+        assert len(transport._session_expiry) == 2
+    
+    async def test_session_cleanup_spans_batches(self, mock_mcp_server):
+        """Test cleanup expires every session when it yields between batches."""
+        transport = HttpTransport(mock_mcp_server)
+        session_ids = [transport._handle_session(Mock(headers={})) for _ in range(7)]
+        
+        with patch("src.http_transport.CLEANUP_BATCH_SIZE", 3), \
+                patch("src.http_transport.asyncio.sleep", wraps=asyncio.sleep) as sleep, \
+                patch("src.http_transport.time.monotonic", return_value=time.monotonic() + SESSION_TIMEOUT + 1):
+            await transport._cleanup_sessions()
+        
+        assert sleep.await_count >= 2
+        assert not any(sid in transport._sessions for sid in session_ids)
+        assert transport._session_expiry == []
+    
+    async def test_run_returns_on_shutdown(self, mock_mcp_server):
+        """Test run() exits when shutdown is signalled, including before it started."""
+        early = HttpTransport(mock_mcp_server)
+        with patch.object(early, "start", AsyncMock()), patch.object(early, "stop", AsyncMock()) as stop:
+            early.shutdown()
+            await asyncio.wait_for(early.run(), timeout=1)
+        stop.assert_awaited_once()
+        
+        transport = HttpTransport(mock_mcp_server)
+        with patch.object(transport, "start", AsyncMock()), patch.object(transport, "stop", AsyncMock()) as stop:
+            task = asyncio.create_task(transport.run())
+            await asyncio.sleep(0)
+            assert transport.is_running is True
+            transport.shutdown()
+            await asyncio.wait_for(task, timeout=1)
+        stop.assert_awaited_once()
+        assert transport.is_running is False
 
 
 class TestErrorHandling:
@@ -479,12 +802,10 @@ class TestErrorHandling:
     @pytest.fixture
     def client(self):
         """Create test client with error-prone server."""
-        mock_mcp_server = Mock()
-        mock_mcp_server._tools = {
-            "error_tool": AsyncMock(side_effect=Exception("Tool error")),
-            "timeout_tool": AsyncMock(side_effect=asyncio.TimeoutError("Timeout"))
-        }
-        transport = HttpTransport(mock_mcp_server)
+        transport = HttpTransport(FakeMcp({
+            "error_tool": async_raise(Exception("Tool error")),
+            "timeout_tool": async_raise(asyncio.TimeoutError("Timeout"))
+        }))
         return TestClient(transport.app)
     
     def test_tool_exception_handling(self, client):
@@ -517,9 +838,32 @@ class TestErrorHandling:
         data = response.json()
         assert "error" in data
         assert data["error"]["code"] == -32603
+    
+    def test_tool_timeout_enforced(self):
+        """Test tools running past the transport's timeout are cancelled."""
+        cancelled = []
+        
+        async def hanging_tool(**kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        
+        transport = HttpTransport(FakeMcp({"hanging_tool": hanging_tool}), tool_timeout=0.05)
+        response = TestClient(transport.app).post("/mcp", json={
+            "jsonrpc": "2.0",
+            "method": "hanging_tool",
+            "id": 1
+        })
+        
+        assert response.status_code == 500
+        data = response.json()
+        assert data["error"]["code"] == -32603
+        assert "timed out" in data["error"]["message"]
+        assert cancelled == [True]
 
 
-@pytest.mark.asyncio
 async def test_transport_error_exception():
     """Test TransportError exception."""
     error = TransportError(